@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Orthodox Calendar Data Server
+Python replacement for get_cal_data.php: loads the feast CSV once, keeps it
+indexed by month and answers month requests from memory.
+
+    GET /get_cal_data.php?month=01[&year=2025]
+
+Responses carry ETag/Last-Modified and unchanged data is answered with 304.
+The CSV is reloaded only when its modification time changes.
+
+Usage: python cal_data_server.py [--csv orthodox_feasts.csv] [--host 127.0.0.1] [--port 8000]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'orthodox_feasts.csv')
+DEFAULT_MONTH = '01'
+ROUTES = ('/get_cal_data.php', '/get_cal_data')
+
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+MONTH_RE = re.compile(r'^(0[1-9]|1[0-2])$')
+YEAR_RE = re.compile(r'^\d{4}$')
+
+TRUE_VALUES = {'true', '1', 'yes', 'да', 'y'}
+FALSE_VALUES = {'false', '0', 'no', 'не', 'n', ''}
+INT_COLUMNS = ('fast_type', 'moon_phase')
+
+
+def parse_boolean_value(value: str) -> bool:
+    """Same rules as parseBooleanValue() in get_cal_data.php."""
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    # If it's not clearly false, default to true
+    return True
+
+
+def is_valid_date(date_str: str) -> bool:
+    if not DATE_RE.match(date_str):
+        return False
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d')
+    except ValueError:
+        return False
+    return True
+
+
+def read_feasts(csv_path: str) -> List[Dict]:
+    """Read and validate the feast CSV (comma or tab separated) into get_cal_data.php rows."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header_line = f.readline()
+        delimiter = '\t' if '\t' in header_line else ','
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        headers = [h.strip().lower() for h in next(reader, [])]
+        if 'date' not in headers:
+            raise ValueError("Required 'date' column not found in CSV")
+        index = {name: i for i, name in reversed(list(enumerate(headers)))}
+        name_column = 'feast_name' if 'feast_name' in index else 'name'
+
+        def cell(row, column, default=None):
+            i = index.get(column)
+            if i is None or i >= len(row):
+                return default
+            return row[i].strip()
+
+        feasts = []
+        for row in reader:
+            if not any(row):
+                continue
+            date_str = cell(row, 'date', '')
+            if not is_valid_date(date_str):
+                continue
+            feast = {
+                'date': date_str,
+                'feast_name': cell(row, name_column, ''),
+                'description': cell(row, 'description', ''),
+            }
+            for column in ('show_fish', 'show_oil', 'show_strict_fast'):
+                value = cell(row, column)
+                feast[column] = parse_boolean_value(value) if value is not None else True
+            for column in INT_COLUMNS:
+                value = cell(row, column)
+                if value is not None:
+                    feast[column] = int(value) if value.lstrip('-').isdigit() else value
+            feasts.append(feast)
+    return feasts
+
+
+class MonthSnapshot:
+    """One load of the CSV: feasts by (year, month) and the JSON responses built from them."""
+
+    def __init__(self, by_month: Dict[Tuple[str, str], List[Dict]], mtime: Optional[float]):
+        self.by_month = by_month
+        self.mtime = mtime
+        self.years: List[str] = sorted({year for year, _ in by_month})
+        self.responses: Dict[Tuple[Optional[str], str], Tuple[bytes, str]] = {}
+
+    def month(self, month: str, year: Optional[str] = None) -> Tuple[bytes, str]:
+        """JSON body and ETag for one month; all years of that month when year is None."""
+        key = (year, month)
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+        if year is not None:
+            feasts = self.by_month.get((year, month), [])
+        else:
+            feasts = [feast for y in self.years for feast in self.by_month.get((y, month), [])]
+        body = json.dumps(feasts, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.responses[key] = (body, etag)
+        return body, etag
+
+
+class FeastIndex:
+    """
+    The current MonthSnapshot of the CSV, replaced as a whole when the file
+    changes, so a response is never cached against feasts of another load.
+    While the CSV does not exist every month is empty, as get_cal_data.php returns [].
+    """
+
+    MISSING_MTIME = 0.0  # mtime of the empty snapshot served while the CSV is missing
+
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+        self.snapshot = MonthSnapshot({}, None)
+        self.lock = threading.Lock()
+
+    @property
+    def mtime(self) -> Optional[float]:
+        return self.snapshot.mtime
+
+    @property
+    def years(self) -> List[str]:
+        return self.snapshot.years
+
+    def refresh(self) -> MonthSnapshot:
+        """Reload the CSV if its mtime changed since the last load; returns the current snapshot."""
+        try:
+            mtime = os.stat(self.csv_path).st_mtime
+        except FileNotFoundError:
+            mtime = self.MISSING_MTIME
+        snapshot = self.snapshot
+        if mtime == snapshot.mtime:
+            return snapshot
+        with self.lock:
+            if mtime == self.snapshot.mtime:
+                return self.snapshot
+            by_month: Dict[Tuple[str, str], List[Dict]] = {}
+            feasts = read_feasts(self.csv_path) if mtime != self.MISSING_MTIME else []
+            for feast in sorted(feasts, key=lambda feast: feast['date']):
+                by_month.setdefault((feast['date'][:4], feast['date'][5:7]), []).append(feast)
+            self.snapshot = MonthSnapshot(by_month, mtime)
+            return self.snapshot
+
+    def month(self, month: str, year: Optional[str] = None) -> Tuple[bytes, str]:
+        return self.snapshot.month(month, year)
+
+
+def validated_month(query: Dict[str, List[str]]) -> str:
+    month = query.get('month', [DEFAULT_MONTH])[0].strip().rjust(2, '0')
+    return month if MONTH_RE.match(month) else DEFAULT_MONTH
+
+
+def validated_year(query: Dict[str, List[str]]) -> Optional[str]:
+    year = query.get('year', [''])[0].strip()
+    return year if YEAR_RE.match(year) else None
+
+
+class CalendarRequestHandler(BaseHTTPRequestHandler):
+    index: FeastIndex = None
+
+    def send_common_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+
+    def not_modified(self, etag: str, last_modified: float) -> bool:
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in ROUTES:
+            self.send_error(404)
+            return
+
+        query = parse_qs(url.query, keep_blank_values=True)
+        try:
+            # One snapshot for the body, ETag and Last-Modified, even if the CSV is reloaded meanwhile
+            snapshot = self.index.refresh()
+            body, etag = snapshot.month(validated_month(query), validated_year(query))
+        except Exception as e:
+            self.log_error("API Error: %s", e)
+            body = json.dumps({'error': 'Internal server error', 'message': 'Unable to process request'},
+                              ensure_ascii=False).encode('utf-8')
+            self.send_response(500)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_common_headers()
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        last_modified = snapshot.mtime
+        if self.not_modified(etag, last_modified):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_common_headers()
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(last_modified, usegmt=True))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_common_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(csv_path: str = DEFAULT_CSV, host: str = '127.0.0.1', port: int = 8000) -> ThreadingHTTPServer:
+    index = FeastIndex(csv_path)
+    index.refresh()
+    handler = type('Handler', (CalendarRequestHandler,), {'index': index})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve calendar month data (get_cal_data.php compatible).')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='feast CSV file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    server = make_server(args.csv, args.host, args.port)
+    print(f"Serving {args.csv} on http://{args.host}:{args.port}/get_cal_data.php")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
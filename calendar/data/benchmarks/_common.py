@@ -0,0 +1,29 @@
+"""
+Shared scaffolding for the bench_*.py scripts: each times an old and a new
+implementation of the same step and fails if their outputs differ.
+
+Usage: from _common import check_identical, make_parser, timed
+"""
+
+import argparse
+import sys
+import time
+
+
+def make_parser(doc: str) -> argparse.ArgumentParser:
+    """Argument parser described by the first line of the script's docstring."""
+    return argparse.ArgumentParser(description=doc.strip().splitlines()[0])
+
+
+def timed(func, *args):
+    """(result, seconds) for one call of func(*args)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def check_identical(identical: bool, label: str = 'Identical'):
+    """Print whether the outputs matched; exit with status 1 if they did not."""
+    print(f"{label}: {identical}")
+    if not identical:
+        sys.exit(1)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: calendar TSV writer vs the old iterrows() writer.
+
+Builds a 100-year (36,500 row) calendar frame, writes it with both writers,
+checks that the files are byte-identical and prints the timings.
+
+Usage: python bench_calendar_tsv.py [--rows 36500]
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from calendar_tsv import write_calendar_tsv  # noqa: E402
+from _common import check_identical, make_parser, timed  # noqa: E402
+
+
+def write_iterrows(df, path):
+    """The writer moon_phase_astropy.py used before calendar_tsv."""
+    with open(path, 'w', encoding='utf-8') as f:
+        headers = df.columns.tolist()
+        f.write('\t'.join(headers) + '\n')
+        for _, row in df.iterrows():
+            values = []
+            for col in headers:
+                val = row[col]
+                if pd.isna(val) or val is None:
+                    val = ''
+                else:
+                    val = str(val)
+                if col == 'date':
+                    values.append(val)
+                else:
+                    val = val.replace('"', '""')
+                    values.append(f'"{val}"')
+            f.write('\t'.join(values) + '\n')
+
+
+def make_frame(rows):
+    rng = np.random.default_rng(0)
+    names = np.array([
+        '† Нова година. Обрезание Господне (Тип. с. 164)',
+        'Св. Силвестър, папа Римски. Преп. Серафим Саровски',
+        'Св. прор. "Малахия" (Блажи се)',
+        '* Събор на св. 70 апостоли',
+    ], dtype=object)
+    dates = pd.date_range('1950-01-01', periods=rows, freq='D').strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        'date': dates,
+        'feast_name': names[rng.integers(0, len(names), rows)],
+        'description': np.where(rng.random(rows) < 0.05, None, ''),
+        'fast_type': rng.integers(0, 4, rows),
+        'moon_phase': rng.integers(0, 5, rows),
+    })
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=36500)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, 'iterrows.tsv')
+        new_path = os.path.join(tmp, 'calendar_tsv.tsv')
+        _, old_time = timed(write_iterrows, df, old_path)
+        _, new_time = timed(write_calendar_tsv, df, new_path)
+        with open(old_path, 'rb') as f_old, open(new_path, 'rb') as f_new:
+            identical = f_old.read() == f_new.read()
+
+    print(f"Rows: {args.rows}")
+    print(f"iterrows writer:     {old_time:.3f} s")
+    print(f"calendar_tsv writer: {new_time:.3f} s")
+    print(f"Speedup: {old_time / new_time:.1f}x")
+    check_identical(identical, 'Byte-identical')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: clean_feast_names() vs the per-string re.sub loop clean_feast_content used.
+
+Repeats raw/2025.txt over many years, parses it, and cleans every feast
+name three ways: the old loop (13 uncompiled re.sub calls per name), the
+compiled clean_feast_content() per name, and clean_feast_names() over the
+whole column. Checks that all three give identical results.
+
+Usage: python bench_clean_feast_content.py [--years 100]
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(DATA_DIR, 'raw'))
+sys.path.insert(0, DATA_DIR)
+
+from bulgarian_calendar_parser import (  # noqa: E402
+    CLEANUP_PATTERNS, BulgarianCalendarParser, clean_feast_content, clean_feast_names)
+from synthetic import make_calendar_text  # noqa: E402
+from _common import check_identical, make_parser, timed  # noqa: E402
+
+
+def clean_feast_content_loop(content):
+    """The clean_feast_content() BulgarianCalendarParser had before the patterns were compiled."""
+    cleaned = content.strip()
+    for pattern in CLEANUP_PATTERNS[:-1]:
+        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(CLEANUP_PATTERNS[-1], ' ', cleaned)
+    return cleaned.strip()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--years', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, 'calendar.txt')
+        make_calendar_text(text_path, args.years)
+        names = [feast.feast_name for feast in BulgarianCalendarParser().iter_feasts(text_path)]
+
+    loop_result, loop_time = timed(lambda: [clean_feast_content_loop(name) for name in names])
+    compiled_result, compiled_time = timed(lambda: [clean_feast_content(name) for name in names])
+    batch_result, batch_time = timed(clean_feast_names, names)
+    identical = loop_result == compiled_result == batch_result
+
+    print(f"Years: {args.years}, feast names: {len(names)} ({len(set(names))} distinct)")
+    print(f"{'re.sub loop (s)':28}{loop_time:10.3f}")
+    print(f"{'compiled, per name (s)':28}{compiled_time:10.3f}{loop_time / compiled_time:8.1f}x")
+    print(f"{'clean_feast_names (s)':28}{batch_time:10.3f}{loop_time / batch_time:8.1f}x")
+    check_identical(identical)
+
+
+if __name__ == "__main__":
+    main()
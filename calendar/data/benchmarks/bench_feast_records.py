@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Feast records vs the per-row dicts the parser and update_fasts.py used.
+
+Repeats raw/2025.txt over many years, parses it, then compares for the whole
+dataset: memory held by the records, the fast rule engine, and CSV writing.
+Checks that both flows write byte-identical CSVs.
+
+Usage: python bench_feast_records.py [--years 100]
+"""
+
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(DATA_DIR, 'raw'))
+sys.path.insert(0, os.path.join(DATA_DIR, 'processed'))
+sys.path.insert(0, DATA_DIR)
+
+from feast_record import DAIRY, DAIRY_COLUMN, FIELDNAMES, FISH, FLAG_COLUMNS, OIL, STRICT, write_feasts  # noqa: E402
+from bulgarian_calendar_parser import BulgarianCalendarParser  # noqa: E402
+from synthetic import make_calendar_text  # noqa: E402
+import update_fasts  # noqa: E402
+from _common import check_identical, make_parser, timed  # noqa: E402
+
+ROW_FLAG_COLUMNS = FLAG_COLUMNS + ((DAIRY_COLUMN, DAIRY),)
+
+
+def apply_fast_rules_dicts(rows):
+    """The dict-based apply_fast_rules() update_fasts.py had before Feast records."""
+    compiled = {}
+    keyword_masks = [(rule['keyword'], update_fasts.rule_masks(rule['set'])) for rule in update_fasts.KEYWORD_RULES]
+    for row in rows:
+        date_str = row['date']
+        year, month, day = int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])
+        if year not in compiled:
+            compiled[year] = (date(year, 1, 1).toordinal(), update_fasts.compile_fast_rules(year))
+        jan_1, (keep, setm) = compiled[year]
+        doy = date(year, month, day).toordinal() - jan_1
+        flags = 0
+        for column, bit in ROW_FLAG_COLUMNS:
+            if row[column] == 'true':
+                flags |= bit
+        flags = (flags & keep[doy]) | setm[doy]
+        feast_name = row['feast_name']
+        for keyword, (rule_keep, rule_set) in keyword_masks:
+            if keyword in feast_name:
+                flags = (flags & rule_keep) | rule_set
+        if '†' in feast_name:
+            if flags & STRICT:
+                flags = (flags & ~STRICT) | OIL
+            elif flags & OIL:
+                flags = (flags & ~OIL) | FISH
+            elif flags & FISH:
+                flags &= ~FISH
+        for column, bit in ROW_FLAG_COLUMNS:
+            row[column] = 'true' if flags & bit else 'false'
+    return rows
+
+
+def write_dicts(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES, quoting=csv.QUOTE_ALL)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_records(feasts):
+    buffer = io.StringIO()
+    write_feasts(feasts, buffer)
+    return buffer.getvalue()
+
+
+def measured(build):
+    """(result, seconds, bytes held by the result) for building a collection of records."""
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    del result
+    # Memory is measured on a second run, as tracing slows the build down
+    tracemalloc.start()
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, allocated
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument('--years', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, 'calendar.txt')
+        make_calendar_text(text_path, args.years)
+        calendar_parser = BulgarianCalendarParser()
+        _, parse_time = timed(calendar_parser.parse_file, text_path)
+        # The dicts the parser used to yield: one per feast, with string booleans
+        rows, dict_build_time, dict_bytes = measured(
+            lambda: [feast.as_dict() for feast in calendar_parser.iter_feasts(text_path)])
+        feasts, feast_build_time, feast_bytes = measured(
+            lambda: list(calendar_parser.iter_feasts(text_path)))
+
+    _, dict_rules_time = timed(apply_fast_rules_dicts, rows)
+    _, feast_rules_time = timed(update_fasts.apply_fast_rules, feasts)
+    dict_text, dict_write_time = timed(write_dicts, rows)
+    feast_text, feast_write_time = timed(write_records, feasts)
+    identical = dict_text == feast_text
+
+    print(f"Years: {args.years}, feasts: {len(feasts)} (parse_file: {parse_time:.3f} s)")
+    print(f"{'':24}{'dicts':>12}{'Feast':>12}")
+    print(f"{'records held (MiB)':24}{dict_bytes / 2**20:12.2f}{feast_bytes / 2**20:12.2f}")
+    print(f"{'parse to records (s)':24}{dict_build_time:12.3f}{feast_build_time:12.3f}")
+    print(f"{'fast rules (s)':24}{dict_rules_time:12.3f}{feast_rules_time:12.3f}")
+    print(f"{'CSV write (s)':24}{dict_write_time:12.3f}{feast_write_time:12.3f}")
+    check_identical(identical, 'Byte-identical')
+
+
+if __name__ == "__main__":
+    main()
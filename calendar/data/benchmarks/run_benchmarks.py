@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Calendar data pipeline benchmark suite
+Generates synthetic calendars of 1, 10, 100 and 1000 years and times every
+stage on them:
+
+    parse                  BulgarianCalendarParser.parse_file
+    update_fasts           update_fasts.update_orthodox_feasts
+    moon_fast              moon_phases fast backend
+    moon_ephem             moon_phases ephem backend (cold lunation cache)
+    moon_astropy           moon_phases astropy backend
+    moon_astropy_script    new-with-moon/moon_phase_astropy.compute_phases
+    quote                  new-with-moon/parse.py quote_feasts
+    serve                  cal_data_server month filter (index load + every month)
+
+Each stage runs in a fresh process, so its peak RSS is its own. Import time,
+wall time, CPU time, peak RSS and rows/sec go to a JSON results file. With --baseline,
+results are compared to a stored run and regressions are reported (exit 1).
+astropy runs offline: IERS auto-download and all remote data access are
+switched off.
+
+Usage: python run_benchmarks.py [--years 1 10 100 1000] [--stages parse serve]
+                                [--baseline baseline.json] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.dirname(BENCH_DIR)
+CALENDAR_DIR = os.path.dirname(DATA_DIR)
+for path in (CALENDAR_DIR, os.path.join(DATA_DIR, 'new-with-moon'), os.path.join(DATA_DIR, 'raw'),
+             os.path.join(DATA_DIR, 'processed'), DATA_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from stage_metrics import peak_rss_mb  # noqa: E402
+
+DEFAULT_YEARS = [1, 10, 100, 1000]
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, 'build', 'benchmarks', 'results.json')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05  # Differences below this are timer noise
+ASTROPY_MAX_YEARS = 100  # astropy takes minutes per 1000 years
+
+
+# Stage implementations: (inputs dict) -> None. Inputs are prepared once per size.
+
+def stage_parse(inputs: Dict):
+    from bulgarian_calendar_parser import BulgarianCalendarParser
+    BulgarianCalendarParser().parse_file(inputs['text'])
+
+
+def stage_update_fasts(inputs: Dict):
+    from update_fasts import update_orthodox_feasts
+    update_orthodox_feasts(inputs['raw_csv'], os.path.join(inputs['workdir'], 'fasts.csv'))
+
+
+def _moon_dates(inputs: Dict):
+    import numpy as np
+    return np.arange(np.datetime64(inputs['first_date'], 'D'), np.datetime64(inputs['last_date'], 'D') + 1)
+
+
+def stage_moon_fast(inputs: Dict):
+    import moon_phases
+    moon_phases.phases(_moon_dates(inputs), 'fast')
+
+
+def stage_moon_ephem(inputs: Dict):
+    import moon_phases
+    moon_phases.ephem_phases(_moon_dates(inputs), cache_dir=os.path.join(inputs['workdir'], 'lunation_cache'))
+
+
+def stage_moon_astropy(inputs: Dict):
+    import moon_phases
+    moon_phases.phases(_moon_dates(inputs), 'astropy')
+
+
+def stage_moon_astropy_script(inputs: Dict):
+    from moon_phase_astropy import compute_phases
+    compute_phases(_moon_dates(inputs))
+
+
+def stage_quote(inputs: Dict):
+    from parse import quote_feasts
+    quote_feasts(inputs['excel_csv'], os.path.join(inputs['workdir'], 'quoted_moon.csv'))
+
+
+def stage_serve(inputs: Dict):
+    from cal_data_server import FeastIndex
+    index = FeastIndex(inputs['calendar_tsv'])
+    index.refresh()
+    for year in index.years:
+        for month in range(1, 13):
+            index.month(f'{month:02d}', year)
+    for month in range(1, 13):
+        index.month(f'{month:02d}')
+
+
+ASTROPY_MODULES = ('astropy.coordinates', 'astropy.time')
+
+# name -> (function, what its rows are, modules imported (and timed) before the run, needs astropy)
+STAGES = {
+    'parse': (stage_parse, 'feasts', ('bulgarian_calendar_parser',), False),
+    'update_fasts': (stage_update_fasts, 'feasts', ('update_fasts',), False),
+    'moon_fast': (stage_moon_fast, 'days', ('moon_phases',), False),
+    'moon_ephem': (stage_moon_ephem, 'days', ('moon_phases', 'ephem'), False),
+    'moon_astropy': (stage_moon_astropy, 'days', ('moon_phases',) + ASTROPY_MODULES, True),
+    'moon_astropy_script': (stage_moon_astropy_script, 'days', ('moon_phase_astropy',) + ASTROPY_MODULES, True),
+    'quote': (stage_quote, 'feasts', ('parse',), False),
+    'serve': (stage_serve, 'feasts', ('cal_data_server',), False),
+}
+
+
+def astropy_offline():
+    """Keep astropy from reaching the network: bundled IERS tables only."""
+    import warnings
+    import moon_phases
+    moon_phases.configure_astropy(offline=True)
+    warnings.filterwarnings('ignore', module='erfa')  # "dubious year" for synthetic dates far from today
+
+
+def run_stage(name: str, inputs: Dict) -> Dict:
+    """Worker: run one stage in this (fresh) process and measure it."""
+    func, _, modules, needs_astropy = STAGES[name]
+    import_start = time.perf_counter()
+    if needs_astropy:
+        astropy_offline()
+    for module in modules:
+        importlib.import_module(module)
+    import_s = time.perf_counter() - import_start
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):  # Stage scripts report progress with print()
+        func(inputs)
+    return {
+        'import_s': round(import_s, 4),
+        'wall_s': round(time.perf_counter() - wall_start, 4),
+        'cpu_s': round(time.process_time() - cpu_start, 4),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def prepare_inputs(workdir: str, years: int) -> Dict:
+    """Synthetic calendar text plus the CSV layouts the later stages read."""
+    from bulgarian_calendar_parser import BulgarianCalendarParser
+    from calendar_tsv import write_calendar_tsv
+    from feast_record import write_feasts
+    from synthetic import START_YEAR, make_calendar_text, make_excel_csv
+    import moon_phases
+    import update_fasts
+
+    inputs = {'workdir': workdir, 'text': os.path.join(workdir, 'calendar.txt')}
+    make_calendar_text(inputs['text'], years)
+    feasts = BulgarianCalendarParser().parse_file(inputs['text'])
+    inputs['raw_csv'] = os.path.join(workdir, 'raw.csv')
+    with open(inputs['raw_csv'], 'w', encoding='utf-8', newline='') as f:
+        write_feasts(feasts, f)
+    update_fasts.apply_fast_rules(feasts)
+
+    inputs['excel_csv'] = os.path.join(workdir, 'excel.csv')
+    make_excel_csv(inputs['excel_csv'], feasts)
+
+    markers = moon_phases.calendar_markers([feast.date for feast in feasts], 'fast')
+    inputs['calendar_tsv'] = os.path.join(workdir, 'calendar.tsv')
+    write_calendar_tsv([{'date': feast.date, 'feast_name': feast.feast_name, 'description': feast.description,
+                         'fast_type': update_fasts.fast_type(feast.flags), 'moon_phase': int(marker)}
+                        for feast, marker in zip(feasts, markers)],
+                       inputs['calendar_tsv'], ['date', 'feast_name', 'description', 'fast_type', 'moon_phase'])
+
+    inputs['first_date'] = f'{START_YEAR}-01-01'
+    inputs['last_date'] = f'{START_YEAR + years - 1}-12-31'
+    inputs['feasts'] = len(feasts)
+    inputs['days'] = (date(START_YEAR + years, 1, 1) - date(START_YEAR, 1, 1)).days
+    return inputs
+
+
+def run_benchmarks(years_list: List[int], stage_names: List[str],
+                   astropy_max_years: int = ASTROPY_MAX_YEARS) -> List[Dict]:
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for years in years_list:
+        with tempfile.TemporaryDirectory(prefix='calendar_bench_') as workdir:
+            inputs = prepare_inputs(workdir, years)
+            for name in stage_names:
+                _, row_kind, _, needs_astropy = STAGES[name]
+                result = {'stage': name, 'years': years, 'rows': inputs[row_kind]}
+                if needs_astropy and years > astropy_max_years:
+                    result['skipped'] = f'more than {astropy_max_years} years'
+                else:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        result.update(pool.submit(run_stage, name, inputs).result())
+                    result['rows_per_s'] = round(result['rows'] / result['wall_s']) if result['wall_s'] else None
+                results.append(result)
+                print(format_result(result))
+    return results
+
+
+def format_result(result: Dict) -> str:
+    label = f"{result['stage']:20s} {result['years']:5d} y"
+    if 'skipped' in result:
+        return f"{label}  skipped ({result['skipped']})"
+    rss = '-' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}"
+    return (f"{label}  {result['wall_s']:9.3f} s  {result['rows_per_s'] or 0:>10,} rows/s"
+            f"  {rss:>8} MiB peak  (imports {result['import_s']:.2f} s)")
+
+
+def compare_to_baseline(results: List[Dict], baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Regressions of wall time or peak RSS beyond tolerance, as readable lines."""
+    previous = {(result['stage'], result['years']): result
+                for result in baseline.get('results', []) if 'skipped' not in result}
+    regressions = []
+    for result in results:
+        base = previous.get((result['stage'], result['years']))
+        if base is None or 'skipped' in result:
+            continue
+        label = f"{result['stage']} ({result['years']} y)"
+        if (result['wall_s'] > base['wall_s'] * (1 + tolerance)
+                and result['wall_s'] - base['wall_s'] > MIN_REGRESSION_SECONDS):
+            regressions.append(f"{label}: wall time {base['wall_s']:.3f} s -> {result['wall_s']:.3f} s")
+        if (result.get('peak_rss_mb') and base.get('peak_rss_mb')
+                and result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance)):
+            regressions.append(f"{label}: peak RSS {base['peak_rss_mb']:.1f} MiB -> {result['peak_rss_mb']:.1f} MiB")
+    return regressions
+
+
+def write_json(data: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the calendar data pipeline stages.')
+    parser.add_argument('--years', type=int, nargs='+', default=DEFAULT_YEARS, help='synthetic calendar sizes')
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON results file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='stored results to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown/growth before a regression is flagged (0.25 = 25%%)')
+    parser.add_argument('--astropy-max-years', type=int, default=ASTROPY_MAX_YEARS,
+                        help='skip astropy stages for larger calendars')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.years, args.stages, args.astropy_max_years)
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    write_json(report, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        write_json(report, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (store one with --update-baseline)")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Synthetic calendar data for benchmarks
+Repeats raw/2025.txt over a range of years and derives the CSV layouts the
+later stages read from it.
+
+Usage: from synthetic import make_calendar_text, make_excel_csv
+"""
+
+import csv
+import os
+import sys
+from typing import List
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(DATA_DIR, 'processed'))
+sys.path.insert(0, DATA_DIR)
+
+from feast_record import FLAG_COLUMNS, Feast  # noqa: E402
+import update_fasts  # noqa: E402
+
+TEMPLATE_FILE = os.path.join(DATA_DIR, 'raw', '2025.txt')
+TEMPLATE_YEAR = 2025
+START_YEAR = 1900
+
+
+def make_calendar_text(path: str, years: int, start_year: int = START_YEAR):
+    """Calendar text for `years` consecutive years, in the raw/2025.txt layout."""
+    with open(TEMPLATE_FILE, 'r', encoding='utf-8') as f:
+        template = f.read()
+    with open(path, 'w', encoding='utf-8') as f:
+        for year in range(start_year, start_year + years):
+            f.write(template.replace(f'{TEMPLATE_YEAR} година', f'{year} година'))
+            f.write('\n')
+
+
+def make_excel_csv(path: str, feasts: List[Feast]):
+    """The orthodox_feasts_quoted.csv layout parse.py reads: BOM, show_* TRUE/FALSE and fast_type."""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'feast_name', 'description'] + [column for column, _ in FLAG_COLUMNS] + ['fast_type'])
+        for feast in feasts:
+            writer.writerow([feast.date, feast.feast_name, feast.description]
+                            + ['TRUE' if feast.flags & bit else 'FALSE' for _, bit in FLAG_COLUMNS]
+                            + [update_fasts.fast_type(feast.flags)])
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Static Bundle Builder
+Copies the calendar front-end into a deploy directory with content-hashed
+file names, precompressed .gz (and .br, when the brotli package is
+installed) variants of the text assets, and cache headers, so browsers keep
+every asset until it changes.
+
+    pages           index.html, home.html, ...: same name, references to
+                    other assets rewritten to their hashed names, no-cache
+    months manifest months/manifest.json: same name, shard file names
+                    rewritten, no-cache
+    everything else name.<hash>.ext, cached for a year as immutable
+
+Headers are written as _headers (Netlify / Cloudflare Pages format) and,
+with the compressed sizes, in bundle.json. An asset is rewritten and
+recompressed only when its content hash differs from the previous
+bundle.json.
+
+Run build_month_shards.py first so months/ is current.
+
+Usage: python build_bundle.py [site_dir] [output_dir]
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: only .gz variants without it
+    brotli = None
+
+CALENDAR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT_DIR = os.path.join(CALENDAR_DIR, 'data', 'build', 'site')
+BUNDLE_MANIFEST = 'bundle.json'
+HEADERS_FILE = '_headers'
+MONTHS_MANIFEST = 'months/manifest.json'
+
+# Site files, relative to the site directory (glob patterns)
+SITE_FILES = [
+    'index.html', 'home.html', 'landing/*.html',
+    'orthodox_feasts.csv', 'months/*.json',
+    '*.png', '*.jpg', 'icon2/*.png', 'landing/*.jpg',
+]
+PAGE_EXTENSIONS = ('.html',)
+COMPRESS_EXTENSIONS = ('.html', '.csv', '.json', '.js', '.css', '.svg', '.txt')
+HASH_LENGTH = 10
+ENCODING_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+mimetypes.add_type('text/csv', '.csv')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(path: str, digest: str) -> str:
+    """'months/2025-01.json' -> 'months/2025-01.<hash>.json'."""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def is_page(path: str) -> bool:
+    return path.endswith(PAGE_EXTENSIONS)
+
+
+def site_files(site_dir: str) -> List[str]:
+    """Site files as sorted '/'-separated paths relative to site_dir."""
+    found = set()
+    for pattern in SITE_FILES:
+        for path in glob.glob(os.path.join(site_dir, pattern)):
+            if os.path.isfile(path):
+                found.add(os.path.relpath(path, site_dir).replace(os.sep, '/'))
+    return sorted(found)
+
+
+def rewrite_references(text: str, page: str, names: Dict[str, str]) -> str:
+    """Point quoted (or url()) references in a page at the hashed names."""
+    page_dir = os.path.dirname(page)
+    for source, target in names.items():
+        relative = os.path.relpath(source, page_dir or '.').replace(os.sep, '/')
+        new = os.path.relpath(target, page_dir or '.').replace(os.sep, '/')
+        pattern = r'(?<=["\'(`])(\./)?' + re.escape(relative) + r'(?=["\')`?#])'
+        text = re.sub(pattern, lambda match: (match.group(1) or '') + new, text)
+    return text
+
+
+def rewrite_months_manifest(data: bytes, names: Dict[str, str]) -> bytes:
+    """Shard 'file' entries of months/manifest.json renamed to their hashed names."""
+    manifest = json.loads(data.decode('utf-8'))
+    months_dir = os.path.dirname(MONTHS_MANIFEST)
+    for entry in manifest.get('months', {}).values():
+        target = names.get(f"{months_dir}/{entry['file']}")
+        if target:
+            entry['file'] = os.path.basename(target)
+    return json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8')
+
+
+def compressed_variants(data: bytes) -> Dict[str, bytes]:
+    """{'gzip': ..., 'br': ...}, keeping only encodings that are smaller than the data."""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def write_file(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_bundle_manifest(output_dir: str) -> Dict:
+    try:
+        with open(os.path.join(output_dir, BUNDLE_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def output_files(entry: Dict) -> List[str]:
+    """Every file an asset entry puts in the output directory."""
+    return [entry['file']] + [entry['file'] + ENCODING_SUFFIXES[encoding] for encoding in entry['encodings']]
+
+
+def build_asset(output_dir: str, source: str, data: bytes, name: str,
+                previous: Optional[Dict]) -> Tuple[Dict, bool]:
+    """Write one asset (and its compressed variants) unless the previous build has it; (entry, rebuilt)."""
+    digest = content_hash(data)
+    if (previous and previous['sha256'] == digest and previous['file'] == name
+            and all(os.path.exists(os.path.join(output_dir, path)) for path in output_files(previous))):
+        return previous, False
+
+    encodings = {}
+    if source.endswith(COMPRESS_EXTENSIONS):
+        for encoding, body in compressed_variants(data).items():
+            write_file(os.path.join(output_dir, name + ENCODING_SUFFIXES[encoding]), body)
+            encodings[encoding] = len(body)
+    write_file(os.path.join(output_dir, name), data)
+    content_type = mimetypes.guess_type(source)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/json':
+        content_type += '; charset=utf-8'
+    entry = {
+        'file': name,
+        'sha256': digest,
+        'bytes': len(data),
+        'encodings': encodings,
+        'content_type': content_type,
+        'cache_control': REVALIDATE if name == source else IMMUTABLE,
+    }
+    return entry, True
+
+
+def format_headers(assets: Dict[str, Dict]) -> str:
+    """_headers file: cache policy per path, plus Vary for precompressed assets."""
+    lines = []
+    for entry in sorted(assets.values(), key=lambda entry: entry['file']):
+        lines.append(f"/{entry['file']}")
+        lines.append(f"  Cache-Control: {entry['cache_control']}")
+        if entry['encodings']:
+            lines.append('  Vary: Accept-Encoding')
+    return '\n'.join(lines) + '\n'
+
+
+def build_bundle(site_dir: str = CALENDAR_DIR, output_dir: str = DEFAULT_OUTPUT_DIR) -> Dict:
+    """Build the deploy directory; returns the bundle manifest."""
+    previous = load_bundle_manifest(output_dir).get('assets', {})
+    sources = site_files(site_dir)
+    contents = {}
+    for source in sources:
+        with open(os.path.join(site_dir, source), 'rb') as f:
+            contents[source] = f.read()
+
+    # Hashed assets first, so pages and the months manifest can point at them
+    assets = {}
+    names = {}
+    rebuilt = 0
+    for source in sources:
+        if is_page(source) or source == MONTHS_MANIFEST:
+            continue
+        name = hashed_name(source, content_hash(contents[source]))
+        assets[source], changed = build_asset(output_dir, source, contents[source], name, previous.get(source))
+        names[source] = name
+        rebuilt += changed
+
+    for source in sources:
+        if source == MONTHS_MANIFEST:
+            data = rewrite_months_manifest(contents[source], names)
+        elif is_page(source):
+            data = rewrite_references(contents[source].decode('utf-8'), source, names).encode('utf-8')
+        else:
+            continue
+        assets[source], changed = build_asset(output_dir, source, data, source, previous.get(source))
+        rebuilt += changed
+
+    # Remove files of assets that changed name or left the site
+    current = {path for entry in assets.values() for path in output_files(entry)}
+    removed = 0
+    for entry in previous.values():
+        for path in output_files(entry):
+            if path not in current:
+                try:
+                    os.remove(os.path.join(output_dir, path))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+
+    write_file(os.path.join(output_dir, HEADERS_FILE), format_headers(assets).encode('utf-8'))
+    manifest = {'assets': assets}
+    write_file(os.path.join(output_dir, BUNDLE_MANIFEST),
+               json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8'))
+
+    total = sum(entry['bytes'] for entry in assets.values())
+    smallest = sum(min([entry['bytes']] + list(entry['encodings'].values())) for entry in assets.values())
+    print(f"Bundled {len(assets)} assets into {output_dir} ({rebuilt} rebuilt, {removed} old files removed)")
+    print(f"{total / 1024:.0f} KiB, {smallest / 1024:.0f} KiB with the best encoding of each"
+          f"{'' if brotli else ' (install brotli for .br variants)'}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the calendar front-end as a hashed, precompressed bundle.')
+    parser.add_argument('site_dir', nargs='?', default=CALENDAR_DIR)
+    parser.add_argument('output_dir', nargs='?', default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+    build_bundle(args.site_dir, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
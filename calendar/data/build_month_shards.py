@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Month Shard Builder
+Splits the final calendar TSV (date, feast_name, description, fast_type, moon_phase)
+into one pre-sorted JSON file per year-month plus a manifest with content hashes,
+so a month can be served as a small static file.
+
+Usage: python build_month_shards.py [orthodox_feasts.csv] [months_dir]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+from itertools import groupby
+from typing import Dict, Iterator, List
+
+CALENDAR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INPUT = os.path.join(CALENDAR_DIR, 'orthodox_feasts.csv')
+DEFAULT_OUTPUT_DIR = os.path.join(CALENDAR_DIR, 'months')
+MANIFEST_NAME = 'manifest.json'
+
+# Columns the front-end reads as integers
+INT_COLUMNS = ('fast_type', 'moon_phase')
+
+
+def read_calendar_rows(filename: str) -> List[Dict]:
+    """Read the tab-separated calendar, converting integer columns, sorted by date."""
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = []
+        for row in csv.DictReader(f, delimiter='\t'):
+            if not row.get('date'):
+                continue
+            for column in INT_COLUMNS:
+                value = row.get(column)
+                if value is not None and value.lstrip('-').isdigit():
+                    row[column] = int(value)
+            rows.append(row)
+    rows.sort(key=lambda row: row['date'])  # Stable: keeps the order of feasts within a day
+    return rows
+
+
+def month_shards(rows: List[Dict]) -> Iterator:
+    """(YYYY-MM, JSON bytes) for each month present in the date-sorted rows."""
+    for month, month_rows in groupby(rows, key=lambda row: row['date'][:7]):
+        data = json.dumps(list(month_rows), ensure_ascii=False, separators=(',', ':'))
+        yield month, data.encode('utf-8')
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Write data unless the file already has exactly this content (keeps mtimes stable)."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def load_manifest(output_dir: str) -> Dict:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_month_shards(input_file: str = DEFAULT_INPUT, output_dir: str = DEFAULT_OUTPUT_DIR) -> Dict:
+    """Write YYYY-MM.json shards and manifest.json; returns the manifest."""
+    os.makedirs(output_dir, exist_ok=True)
+    previous = load_manifest(output_dir).get('months', {})
+
+    with open(input_file, 'rb') as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+
+    months = {}
+    changed = 0
+    for month, data in month_shards(read_calendar_rows(input_file)):
+        file_name = f'{month}.json'
+        if write_if_changed(os.path.join(output_dir, file_name), data):
+            changed += 1
+        months[month] = {
+            'file': file_name,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'bytes': len(data),
+        }
+
+    # Remove shards for months that are no longer in the source
+    for month, entry in previous.items():
+        if month not in months:
+            try:
+                os.remove(os.path.join(output_dir, entry['file']))
+            except FileNotFoundError:
+                pass
+
+    manifest = {
+        'source': os.path.basename(input_file),
+        'source_sha256': source_hash,
+        'months': months,
+    }
+    manifest_data = json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8')
+    write_if_changed(os.path.join(output_dir, MANIFEST_NAME), manifest_data)
+
+    print(f"Wrote {len(months)} month shards to {output_dir} ({changed} changed)")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build per-month JSON shards of the calendar.')
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT)
+    parser.add_argument('output_dir', nargs='?', default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+    build_month_shards(args.input, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Calendar checks
+Streaming validation of a generated feast file and a row-level diff between
+two of them, for checking a rebuild before it is published. Both read the
+files once, row by row, in any variant feast_schema reads, so memory does
+not grow with the number of years.
+
+validate checks, in one pass:
+    order        dates must be ascending
+    duplicate    a date appears more than once
+    missing      days missing between two consecutive dates
+    fast_type    fast_type outside 0-4
+    fast_flags   strict fast together with oil or fish (warning)
+    moon         moon phase continuity:
+                 markers (calendar moon_phase, 1-4 on the last day of each
+                 phase): non-zero values cycle 1, 2, 3, 4 and are 5-10 days apart
+                 codes (ephem output, 0-7 on change and -1 otherwise): each
+                 change is the next code, mod 8
+
+diff joins the two files on date (both must be sorted) and reports added,
+removed and changed rows with the fields that differ.
+
+Usage: python calendar_check.py validate ../orthodox_feasts.csv [--moon auto|markers|codes|none] [--strict]
+       python calendar_check.py diff deployed.csv rebuilt.csv [--max 50]
+"""
+
+import argparse
+import csv
+import itertools
+import sys
+import time
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from feast_record import FISH, FLAG_COLUMNS, OIL, STRICT
+from feast_schema import MOON_COLUMNS, MOON_MISSING, parse_row
+
+DEFAULT_MAX_ISSUES = 50
+MOON_MODES = ('auto', 'markers', 'codes', 'none')
+MOON_DETECT_ROWS = 40  # The ephem codes have a -1 within every few days
+MARKER_GAP = (5, 10)   # Days between consecutive phase markers (a quarter is ~7.4)
+WARNINGS = ('fast_flags',)
+DIFF_FIELDS = ('feast_name', 'description', 'fast_type', 'flags', 'moon_phase')
+
+Row = Tuple[str, str, str, int, int, int]  # feast_schema.parse_row()
+
+
+class FeastFile:
+    """A feast CSV (any variant), read lazily as parse_row() tuples or as raw cells."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'r', encoding='utf-8-sig', newline='')
+        header = self._file.readline()
+        self._file.seek(0)
+        self._reader = csv.reader(self._file, delimiter='\t' if '\t' in header else ',')
+        self.fieldnames = next(self._reader, [])
+        self._date_index = self.fieldnames.index('date') if 'date' in self.fieldnames else 0
+        self.has_flags = all(column in self.fieldnames for column, _ in FLAG_COLUMNS)
+        self.has_moon = any(column in self.fieldnames for column in MOON_COLUMNS)
+
+    def parse(self, cells: List[str]) -> Optional[Row]:
+        return parse_row(dict(zip(self.fieldnames, cells)))
+
+    def records(self) -> Iterator[Tuple[str, List[str]]]:
+        """(date, cells) per row, without parsing the other cells."""
+        index = self._date_index
+        for cells in self._reader:
+            if len(cells) > index and cells[index].strip():
+                yield cells[index].strip(), cells
+
+    def __iter__(self) -> Iterator[Row]:
+        for _, cells in self.records():
+            yield self.parse(cells)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Issues:
+    """Issue counts by kind, keeping the first few of each for the report."""
+
+    def __init__(self, max_issues: int = DEFAULT_MAX_ISSUES):
+        self.max_issues = max_issues
+        self.counts: Counter = Counter()
+        self.examples: List[Tuple[str, str, str]] = []
+
+    def add(self, kind: str, date_str: str, message: str, count: int = 1):
+        self.counts[kind] += count
+        if len(self.examples) < self.max_issues:
+            self.examples.append((kind, date_str, message))
+
+    def errors(self, strict: bool = False) -> int:
+        return sum(count for kind, count in self.counts.items() if strict or kind not in WARNINGS)
+
+
+def detect_moon_mode(rows: List[Row]) -> str:
+    """'codes' if the first rows have ephem change codes (-1 or 5-7), else 'markers' (or 'none')."""
+    moons = [row[5] for row in rows if row[5] != MOON_MISSING]
+    if not moons:
+        return 'none'
+    return 'codes' if any(moon == -1 or moon > 4 for moon in moons) else 'markers'
+
+
+def validate(rows: Iterator[Row], moon: str = 'auto', max_issues: int = DEFAULT_MAX_ISSUES) -> Dict:
+    """Check every row once; returns the summary and the Issues."""
+    rows = iter(rows)
+    if moon == 'auto':
+        head = list(itertools.islice(rows, MOON_DETECT_ROWS))
+        moon = detect_moon_mode(head)
+        rows = itertools.chain(head, rows)
+
+    issues = Issues(max_issues)
+    count = 0
+    first = last = None
+    previous = None          # Ordinal of the previous row
+    last_marker = None       # (ordinal, marker) of the previous non-zero marker
+    last_code = None         # Previous ephem phase code
+
+    for date_str, _, _, flags, fast_type, moon_phase in rows:
+        count += 1
+        try:
+            ordinal = date.fromisoformat(date_str).toordinal()
+        except ValueError:
+            issues.add('date', date_str, 'not a YYYY-MM-DD date')
+            continue
+        if first is None:
+            first = date_str
+        last = date_str
+
+        if previous is not None:
+            if ordinal < previous:
+                issues.add('order', date_str, f'comes after {date.fromordinal(previous)}')
+            elif ordinal == previous:
+                issues.add('duplicate', date_str, 'date repeated')
+            elif ordinal > previous + 1:
+                gap = ordinal - previous - 1
+                issues.add('missing', date_str, f'{gap} day(s) missing after {date.fromordinal(previous)}', gap)
+        previous = max(ordinal, previous) if previous is not None else ordinal
+
+        if fast_type > 4:
+            issues.add('fast_type', date_str, f'fast_type {fast_type} outside 0-4')
+        if flags & STRICT and flags & (OIL | FISH):
+            allowed = ' and '.join(name for name, bit in (('oil', OIL), ('fish', FISH)) if flags & bit)
+            issues.add('fast_flags', date_str, f'strict fast also allows {allowed}')
+
+        if moon == 'markers' and moon_phase != MOON_MISSING:
+            if not 0 <= moon_phase <= 4:
+                issues.add('moon', date_str, f'phase marker {moon_phase} outside 0-4')
+            elif moon_phase:
+                if last_marker is not None:
+                    last_ordinal, last_phase = last_marker
+                    expected = last_phase % 4 + 1
+                    if moon_phase != expected:
+                        issues.add('moon', date_str, f'phase {moon_phase} follows {last_phase} (expected {expected})')
+                    elif not MARKER_GAP[0] <= ordinal - last_ordinal <= MARKER_GAP[1]:
+                        issues.add('moon', date_str, f'phase {moon_phase} {ordinal - last_ordinal} days after the last one')
+                last_marker = (ordinal, moon_phase)
+        elif moon == 'codes' and moon_phase != MOON_MISSING and moon_phase != -1:
+            if not 0 <= moon_phase <= 7:
+                issues.add('moon', date_str, f'phase code {moon_phase} outside 0-7')
+            elif last_code is not None and moon_phase != (last_code + 1) % 8:
+                issues.add('moon', date_str, f'phase code {moon_phase} follows {last_code}')
+            last_code = moon_phase
+
+    return {'rows': count, 'first': first, 'last': last, 'moon': moon, 'issues': issues}
+
+
+def date_groups(records: Iterator[Tuple[str, List[str]]]) -> Iterator[Tuple[str, List[List[str]]]]:
+    """(date, cells of each row of that date), checking the dates ascend."""
+    previous = None
+    for date_str, group in itertools.groupby(records, key=lambda record: record[0]):
+        if previous is not None and date_str < previous:
+            raise ValueError(f'not sorted by date: {date_str} after {previous}')
+        previous = date_str
+        yield date_str, [cells for _, cells in group]
+
+
+def row_fields(row: Row) -> Dict:
+    return dict(zip(DIFF_FIELDS, row[1:]))
+
+
+def diff(old: FeastFile, new: FeastFile) -> Iterator[Tuple[str, str, Optional[Row], Optional[Row], List[str]]]:
+    """
+    Sorted merge join of two feast files on date.
+
+    Yields (kind, date, old_row, new_row, changed_fields) with kind 'added',
+    'removed' or 'changed'; the n-th rows of a date are paired with each
+    other. Flags and moon phases are compared only if both files have them.
+    Files with the same header skip parsing rows whose cells are identical.
+    """
+    fields = [(field, index) for index, field in enumerate(DIFF_FIELDS, 1)
+              if (field != 'flags' or (old.has_flags and new.has_flags))
+              and (field != 'moon_phase' or (old.has_moon and new.has_moon))]
+    same_layout = old.fieldnames == new.fieldnames
+    old_groups, new_groups = date_groups(old.records()), date_groups(new.records())
+    old_item, new_item = next(old_groups, None), next(new_groups, None)
+    while old_item is not None or new_item is not None:
+        if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+            for cells in old_item[1]:
+                yield 'removed', old_item[0], old.parse(cells), None, []
+            old_item = next(old_groups, None)
+        elif old_item is None or new_item[0] < old_item[0]:
+            for cells in new_item[1]:
+                yield 'added', new_item[0], None, new.parse(cells), []
+            new_item = next(new_groups, None)
+        else:
+            date_str = old_item[0]
+            for old_cells, new_cells in itertools.zip_longest(old_item[1], new_item[1]):
+                if new_cells is None:
+                    yield 'removed', date_str, old.parse(old_cells), None, []
+                elif old_cells is None:
+                    yield 'added', date_str, None, new.parse(new_cells), []
+                elif not (same_layout and old_cells == new_cells):
+                    old_row, new_row = old.parse(old_cells), new.parse(new_cells)
+                    changed = [field for field, index in fields if old_row[index] != new_row[index]]
+                    if changed:
+                        yield 'changed', date_str, old_row, new_row, changed
+            old_item, new_item = next(old_groups, None), next(new_groups, None)
+
+
+def diff_files(old_path: str, new_path: str) -> Iterator[Tuple[str, str, Optional[Row], Optional[Row], List[str]]]:
+    with FeastFile(old_path) as old, FeastFile(new_path) as new:
+        yield from diff(old, new)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a generated calendar file or diff two of them.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check = subparsers.add_parser('validate')
+    check.add_argument('path')
+    check.add_argument('--moon', choices=MOON_MODES, default='auto', help='how to check the moon phase column')
+    check.add_argument('--strict', action='store_true', help='fail on warnings too')
+    check.add_argument('--max-issues', type=int, default=DEFAULT_MAX_ISSUES, help='issues to list')
+    compare = subparsers.add_parser('diff')
+    compare.add_argument('old')
+    compare.add_argument('new')
+    compare.add_argument('--max', type=int, default=DEFAULT_MAX_ISSUES, help='differences to list')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'validate':
+        with FeastFile(args.path) as rows:
+            report = validate(iter(rows), args.moon, args.max_issues)
+        issues = report['issues']
+        for kind, date_str, message in issues.examples:
+            print(f"{date_str}\t{kind}\t{message}")
+        print(f"{report['rows']} rows, {report['first']} to {report['last']}, moon check: {report['moon']}")
+        for kind, count in sorted(issues.counts.items()):
+            print(f"  {kind}: {count}{' (warning)' if kind in WARNINGS else ''}")
+        print(f"Checked in {time.perf_counter() - start:.2f} s")
+        sys.exit(1 if issues.errors(args.strict) else 0)
+
+    counts: Counter = Counter()
+    for kind, date_str, old_row, new_row, changed in diff_files(args.old, args.new):
+        counts[kind] += 1
+        if sum(counts.values()) > args.max:
+            continue
+        if kind == 'changed':
+            old_values, new_values = row_fields(old_row), row_fields(new_row)
+            details = '; '.join(f'{field}: {old_values[field]!r} -> {new_values[field]!r}' for field in changed)
+            print(f"{date_str}\tchanged\t{details}")
+        else:
+            print(f"{date_str}\t{kind}\t{(old_row or new_row)[1]}")
+    summary = ', '.join(f'{counts[kind]} {kind}' for kind in ('added', 'removed', 'changed'))
+    print(f"{summary} ({time.perf_counter() - start:.2f} s)")
+    sys.exit(1 if counts else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Calendar store
+Date-ordered, read-only feast data with O(log n) lookups by day, range,
+month and fast_type, for scripts that query a multi-year (or multi-century)
+dataset many times instead of scanning it.
+
+Rows are sorted by day ordinal (datetime.date.toordinal()); a lookup is two
+np.searchsorted calls and a slice. fast_type lookups go through a row index
+grouped by fast_type and sorted by date within each group, built on first
+use, so they are searchsorted calls too. Feast names and descriptions are kept as
+uint32 codes into a table of distinct strings, so slices stay cheap and only
+the rows a query returns become Python strings. Results are feast_schema
+FeastTables.
+
+A store can be saved as a directory of .npy files and opened memory-mapped:
+worker processes that open the same directory share one copy of the column
+data through the page cache.
+
+Usage: python calendar_store.py build ../orthodox_feasts.csv build/store
+       python calendar_store.py query build/store 2025-03-01 [--end 2025-04-30] [--fast-type 4]
+       python calendar_store.py query build/store --month 2025-12
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from feast_schema import FeastTable, format_csv, load
+
+STORE_VERSION = 1
+NUMERIC_COLUMNS = ('date', 'flags', 'fast_type', 'moon_phase')
+STRING_COLUMNS = ('feast_name', 'description')
+
+DateLike = Union[str, date, int]
+
+
+def to_ordinal(day: DateLike) -> int:
+    """Day ordinal of a 'YYYY-MM-DD' string, datetime.date or ordinal."""
+    if isinstance(day, str):
+        return date.fromisoformat(day).toordinal()
+    if isinstance(day, date):
+        return day.toordinal()
+    return int(day)
+
+
+def month_bounds(year: int, month: int) -> Tuple[int, int]:
+    """First and last day ordinal of a month."""
+    first = date(year, month, 1)
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return first.toordinal(), next_month.toordinal() - 1
+
+
+class CalendarStore:
+    """Feast rows sorted by date, answering lookups with binary search."""
+
+    def __init__(self, columns, strings):
+        # columns: name -> array for NUMERIC_COLUMNS and '<name>_codes';
+        # strings: name -> tuple of distinct values the codes index
+        self.columns = columns
+        self.strings = strings
+        self.date = columns['date']
+        self._fast_index = None  # (fast_type, row, date) arrays, sorted by fast_type then date
+        self._values = {}
+        for name, values in strings.items():
+            self._values[name] = np.empty(len(values), dtype=object)
+            self._values[name][:] = values
+
+    def __len__(self):
+        return len(self.date)
+
+    @classmethod
+    def from_table(cls, table: FeastTable) -> 'CalendarStore':
+        """A store over a FeastTable (rows of the same day keep their order)."""
+        order = np.argsort(table.date, kind='stable')
+        columns = {name: getattr(table, name)[order] for name in NUMERIC_COLUMNS}
+        strings = {}
+        for name in STRING_COLUMNS:
+            values, codes = np.unique(getattr(table, name)[order].astype(str), return_inverse=True)
+            columns[f'{name}_codes'] = codes.astype(np.uint32)
+            strings[name] = tuple(sys.intern(value) for value in values.tolist())
+        return cls(columns, strings)
+
+    @classmethod
+    def load(cls, path: str) -> 'CalendarStore':
+        """A store over any file feast_schema.load() reads (.npz or a CSV variant)."""
+        return cls.from_table(load(path))
+
+    # Memory-mapped backing
+
+    def save(self, directory: str):
+        """Write the store as .npy files (plus the string tables as JSON) for open()."""
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.columns.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+        meta = {'version': STORE_VERSION, 'rows': len(self), 'strings': {k: list(v) for k, v in self.strings.items()}}
+        with open(os.path.join(directory, 'strings.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def open(cls, directory: str, mmap: bool = True) -> 'CalendarStore':
+        """Open a saved store; with mmap the column files are mapped read-only, not read."""
+        with open(os.path.join(directory, 'strings.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"{directory}: unsupported store version {meta.get('version')}")
+        mmap_mode = 'r' if mmap else None
+        names = list(NUMERIC_COLUMNS) + [f'{name}_codes' for name in STRING_COLUMNS]
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name in names}
+        # Plain ndarray views of the maps; slicing np.memmap objects is several times slower
+        columns = {name: array.view(np.ndarray) for name, array in columns.items()}
+        strings = {name: tuple(sys.intern(value) for value in values) for name, values in meta['strings'].items()}
+        return cls(columns, strings)
+
+    # Queries
+
+    def _rows(self, first: Optional[int], last: Optional[int]) -> Tuple[int, int]:
+        """Row slice bounds for day ordinals first..last inclusive (None: open-ended)."""
+        # Keys in the column's dtype: a Python int would make numpy cast the whole column first
+        key = self.date.dtype.type
+        lo = 0 if first is None else int(self.date.searchsorted(key(first), side='left'))
+        hi = len(self) if last is None else int(self.date.searchsorted(key(last), side='right'))
+        return lo, hi
+
+    def table(self, index=slice(None)) -> FeastTable:
+        """The selected rows (a slice, index array or mask) as a FeastTable."""
+        columns = {name: self.columns[name][index] for name in NUMERIC_COLUMNS}
+        for name in STRING_COLUMNS:
+            columns[name] = self._values[name][self.columns[f'{name}_codes'][index]]
+        return FeastTable(**columns)
+
+    def get(self, day: DateLike) -> FeastTable:
+        """Rows of one day (empty if the day is not in the store)."""
+        ordinal = to_ordinal(day)
+        return self.table(slice(*self._rows(ordinal, ordinal)))
+
+    def range(self, start: DateLike, end: DateLike) -> FeastTable:
+        """Rows from start through end, inclusive."""
+        return self.table(slice(*self._rows(to_ordinal(start), to_ordinal(end))))
+
+    def month(self, year: int, month: int) -> FeastTable:
+        return self.table(slice(*self._rows(*month_bounds(year, month))))
+
+    def fast_days(self, fast_type: int, start: Optional[DateLike] = None,
+                  end: Optional[DateLike] = None) -> FeastTable:
+        """Rows with the given fast_type, from start through end (default: everything)."""
+        fast_types, rows, days = self._fast_type_index()
+        if not 0 <= fast_type <= np.iinfo(fast_types.dtype).max:
+            return self.table(rows[:0])
+        key = fast_types.dtype.type(fast_type)
+        group = slice(int(fast_types.searchsorted(key, side='left')), int(fast_types.searchsorted(key, side='right')))
+        rows, days = rows[group], days[group]
+        key = days.dtype.type
+        lo = 0 if start is None else int(days.searchsorted(key(to_ordinal(start)), side='left'))
+        hi = len(days) if end is None else int(days.searchsorted(key(to_ordinal(end)), side='right'))
+        return self.table(rows[lo:hi])
+
+    def _fast_type_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._fast_index is None:
+            # Stable, so rows keep their date order within each fast_type
+            rows = np.argsort(self.columns['fast_type'], kind='stable')
+            self._fast_index = (self.columns['fast_type'][rows], rows, self.date[rows])
+        return self._fast_index
+
+    def bounds(self) -> Tuple[str, str]:
+        """First and last date in the store."""
+        if not len(self):
+            raise ValueError('empty store')
+        return date.fromordinal(int(self.date[0])).isoformat(), date.fromordinal(int(self.date[-1])).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query a date-indexed calendar store.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='save a feast CSV or .npz as a memory-mappable store')
+    build.add_argument('source')
+    build.add_argument('directory')
+    query = subparsers.add_parser('query', help='print matching rows as calendar TSV')
+    query.add_argument('directory')
+    query.add_argument('date', nargs='?', help='YYYY-MM-DD (start date with --end)')
+    query.add_argument('--end', help='last date of a range')
+    query.add_argument('--month', help='YYYY-MM')
+    query.add_argument('--fast-type', type=int, help='only rows with this fast_type')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        store = CalendarStore.load(args.source)
+        store.save(args.directory)
+        first, last = store.bounds()
+        print(f"Saved {len(store)} rows ({first} to {last}) to {args.directory}")
+        return
+
+    store = CalendarStore.open(args.directory)
+    if args.month:
+        year, month = (int(part) for part in args.month.split('-'))
+        start, end = (date.fromordinal(ordinal) for ordinal in month_bounds(year, month))
+    elif args.date:
+        start, end = args.date, args.end or args.date
+    elif args.fast_type is not None:
+        start = end = None
+    else:
+        parser.error('give a date, --month or --fast-type')
+    if args.fast_type is not None:
+        result = store.fast_days(args.fast_type, start, end)
+    else:
+        result = store.range(start, end)
+    sys.stdout.write(format_csv(result, 'calendar'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Calendar TSV writer
+Writes the project's calendar format: tab-separated, header unquoted, the date
+column unquoted and every other column wrapped in double quotes (embedded
+quotes doubled), missing values written as empty strings.
+
+The whole file is built column by column and written in one call, instead of
+formatting cell by cell.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence
+
+DATE_COLUMN = 'date'
+
+
+def _quote(values: List[str]) -> List[str]:
+    return ['"' + value.replace('"', '""') + '"' for value in values]
+
+
+def _format_frame(df) -> str:
+    """Format a pandas DataFrame with vectorized string operations per column."""
+    formatted = []
+    for column in df.columns:
+        series = df[column]
+        text = series.astype(str).mask(series.isna(), '')
+        if column != DATE_COLUMN:
+            text = '"' + text.str.replace('"', '""', regex=False) + '"'
+        formatted.append(text.tolist())
+    return _join([str(column) for column in df.columns], formatted)
+
+
+def _format_rows(rows: Sequence[Dict], columns: Sequence[str]) -> str:
+    """Format a list of row dicts, column by column."""
+    formatted = []
+    for column in columns:
+        values = ['' if row.get(column) is None else str(row[column]) for row in rows]
+        formatted.append(values if column == DATE_COLUMN else _quote(values))
+    return _join(list(columns), formatted)
+
+
+def _join(headers: List[str], formatted: List[List[str]]) -> str:
+    lines = ['\t'.join(headers)]
+    lines.extend(map('\t'.join, zip(*formatted)))
+    return '\n'.join(lines) + '\n'
+
+
+def format_calendar_tsv(data, columns: Optional[Sequence[str]] = None) -> str:
+    """Calendar TSV text for a DataFrame, or for a list of row dicts with the given columns."""
+    if hasattr(data, 'columns'):
+        return _format_frame(data if columns is None else data[list(columns)])
+    if columns is None:
+        columns = list(data[0]) if data else [DATE_COLUMN]
+    return _format_rows(data, columns)
+
+
+def write_calendar_tsv(data, path: str, columns: Optional[Sequence[str]] = None):
+    """Write data in the calendar TSV format with a single buffered write (atomic replace)."""
+    text = format_calendar_tsv(data, columns)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
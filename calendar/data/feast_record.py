@@ -0,0 +1,116 @@
+"""
+Feast records
+A compact record for one feast line, used by the parser and the fast rule
+engine instead of a dict per row. The show_* booleans are packed into one
+small int bitfield; they become "true"/"false" strings only when a
+record is written out.
+
+Usage: from feast_record import Feast, read_feasts, write_feasts
+"""
+
+import csv
+from typing import Dict, Iterable, List
+
+# Fast flags packed into one small int
+FISH = 1
+OIL = 2
+STRICT = 4
+DAIRY = 8  # Cheese week: dairy and fish, no meat (fast_type 2)
+FLAG_COLUMNS = (('show_fish', FISH), ('show_oil', OIL), ('show_strict_fast', STRICT))
+# Added after the other show_* columns; files without it read as no dairy
+DAIRY_COLUMN = 'show_dairy'
+FIELDNAMES = ['date', 'feast_name', 'description', 'show_fish', 'show_oil', 'show_strict_fast', DAIRY_COLUMN]
+
+
+def parse_flags(row: Dict[str, str]) -> int:
+    """Flag bitfield from the show_* columns of a CSV row."""
+    flags = 0
+    for column, bit in FLAG_COLUMNS:
+        if row[column] == 'true':
+            flags |= bit
+    if row.get(DAIRY_COLUMN) == 'true':
+        flags |= DAIRY
+    return flags
+
+
+def fast_type_from_flags(flags: int) -> int:
+    """fast_type column value as index.html reads it: 4 strict, 3 oil, 2 dairy and fish, 1 fish, 0 no fast."""
+    if flags & STRICT:
+        return 4
+    if flags & OIL:
+        return 3
+    if flags & DAIRY:
+        return 2
+    if flags & FISH:
+        return 1
+    return 0
+
+
+class Feast:
+    """One feast line of a day: ISO date string, name, description and fast flags."""
+
+    __slots__ = ('date', 'feast_name', 'description', 'flags')
+
+    def __init__(self, date: str, feast_name: str, description: str = '', flags: int = 0):
+        self.date = date
+        self.feast_name = feast_name
+        self.description = description
+        self.flags = flags
+
+    @classmethod
+    def from_row(cls, row: Dict[str, str]) -> 'Feast':
+        return cls(row['date'], row['feast_name'], row['description'], parse_flags(row))
+
+    @property
+    def show_fish(self) -> bool:
+        return bool(self.flags & FISH)
+
+    @property
+    def show_oil(self) -> bool:
+        return bool(self.flags & OIL)
+
+    @property
+    def show_strict_fast(self) -> bool:
+        return bool(self.flags & STRICT)
+
+    @property
+    def show_dairy(self) -> bool:
+        return bool(self.flags & DAIRY)
+
+    def values(self) -> List[str]:
+        """CSV cells in FIELDNAMES order."""
+        flags = self.flags
+        return [self.date, self.feast_name, self.description,
+                'true' if flags & FISH else 'false',
+                'true' if flags & OIL else 'false',
+                'true' if flags & STRICT else 'false',
+                'true' if flags & DAIRY else 'false']
+
+    def as_dict(self) -> Dict[str, str]:
+        return dict(zip(FIELDNAMES, self.values()))
+
+    def __eq__(self, other):
+        if not isinstance(other, Feast):
+            return NotImplemented
+        return (self.date, self.feast_name, self.description, self.flags) == \
+               (other.date, other.feast_name, other.description, other.flags)
+
+    def __repr__(self):
+        return f"Feast({self.date!r}, {self.feast_name!r}, {self.description!r}, flags={self.flags})"
+
+
+def read_feasts(path: str) -> List[Feast]:
+    """Read a feast CSV with show_* columns (as written by the parser or update_fasts.py)."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [Feast.from_row(row) for row in csv.DictReader(f)]
+
+
+def write_feasts(feasts: Iterable[Feast], f, quoting: int = csv.QUOTE_ALL) -> int:
+    """Write feasts with a header to an open text file; returns the number written."""
+    writer = csv.writer(f, quoting=quoting)
+    writer.writerow(FIELDNAMES)
+    count = 0
+    for feast in feasts:
+        writer.writerow(feast.values())
+        count += 1
+    return count
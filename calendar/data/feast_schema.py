@@ -0,0 +1,251 @@
+"""
+Canonical feast schema
+One typed, columnar representation of calendar days, with readers for every
+CSV layout the project produces and a compact binary (.npz) format.
+
+Columns and dtypes:
+    date         int32   day ordinal (datetime.date.toordinal())
+    feast_name   object  interned str
+    description  object  interned str
+    flags        uint8   FISH | DAIRY | OIL | STRICT (the show_* columns)
+    fast_type    uint8   as index.html reads it: 0 none, 1 fish, 2 dairy and fish, 3 oil, 4 strict;
+                         FAST_TYPE_OVERFLOW when the source value does not fit
+    moon_phase   int8    as stored in the source; MOON_MISSING when empty, MOON_OVERFLOW when it does not fit
+
+CSV variants:
+    raw       comma, all quoted, show_* "true"/"false"   (bulgarian_calendar_parser.py)
+    flags     comma, minimal quoting, show_* columns      (update_fasts.py)
+    excel     BOM, comma, show_* TRUE/FALSE + fast_type   (orthodox_feasts_quoted.csv, read only;
+              its fast_type uses an older numbering, so it is derived from show_* instead)
+    calendar  tab, date unquoted, rest quoted             (orthodox_feasts.csv served to index.html)
+    quoted    tab, strings quoted, moon_phase unquoted    (parse.py / ephem output)
+"""
+
+import csv
+import io
+import sys
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from calendar_tsv import format_calendar_tsv
+from feast_record import (DAIRY, DAIRY_COLUMN, FIELDNAMES, FISH, FLAG_COLUMNS, OIL, STRICT,
+                          fast_type_from_flags)
+
+# Every show_* column, in FIELDNAMES order
+_FLAG_CELLS = FLAG_COLUMNS + ((DAIRY_COLUMN, DAIRY),)
+FAST_TYPE_FLAGS = (0, FISH, DAIRY | FISH, OIL, STRICT)  # fast_type -> flags when the show_* columns are absent
+MOON_MISSING = -128  # Empty cell; -1 is a real value in the ephem output (no phase change)
+# Values too large for the column dtype; out of range for calendar_check too, so it still reports them
+FAST_TYPE_OVERFLOW = 255
+MOON_OVERFLOW = 127
+
+COLUMNS = ('date', 'feast_name', 'description', 'flags', 'fast_type', 'moon_phase')
+DTYPES = {
+    'date': np.int32,
+    'feast_name': object,
+    'description': object,
+    'flags': np.uint8,
+    'fast_type': np.uint8,
+    'moon_phase': np.int8,
+}
+# Other names the moon phase column has had
+MOON_COLUMNS = ('moon_phase', 'ephem_moon_phase_change', 'moon_phase_change')
+
+VARIANT_COLUMNS = {
+    'raw': FIELDNAMES,
+    'flags': FIELDNAMES,
+    'calendar': ['date', 'feast_name', 'description', 'fast_type', 'moon_phase'],
+    'quoted': ['date', 'feast_name', 'description', 'fast_type', 'moon_phase'],
+}
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def parse_row(row: Dict[str, str]) -> Optional[Tuple[str, str, str, int, int, int]]:
+    """
+    (date, feast_name, description, flags, fast_type, moon_phase) from a
+    csv.DictReader row of any variant, or None for a row without a date.
+    """
+    date_str = (row.get('date') or '').strip()
+    if not date_str:
+        return None
+    intern = sys.intern
+    name = intern(row.get('feast_name') or row.get('name') or '')
+    description = intern(row.get('description') or '')
+
+    flags = 0
+    has_flags = False
+    for column, bit in FLAG_COLUMNS:
+        value = row.get(column)
+        if value is not None:
+            has_flags = True
+            if value.strip().lower() == 'true':
+                flags |= bit
+    if (row.get(DAIRY_COLUMN) or '').strip().lower() == 'true':
+        flags |= DAIRY
+
+    fast_type = (row.get('fast_type') or '').strip()
+    if not has_flags and fast_type.isdigit():
+        fast_type = int(fast_type)
+        # An unknown fast_type is kept as is (calendar_check reports it) with no flags
+        flags = FAST_TYPE_FLAGS[fast_type] if fast_type < len(FAST_TYPE_FLAGS) else 0
+        fast_type = min(fast_type, FAST_TYPE_OVERFLOW)
+    else:
+        fast_type = fast_type_from_flags(flags)
+
+    moon = MOON_MISSING
+    for column in MOON_COLUMNS:
+        value = (row.get(column) or '').strip()
+        if value.lstrip('-').isdigit():
+            moon = int(value)
+            if not MOON_MISSING < moon <= MOON_OVERFLOW:
+                moon = MOON_OVERFLOW
+            break
+    return date_str, name, description, flags, fast_type, moon
+
+
+def ordinals_to_days(ordinals: np.ndarray) -> np.ndarray:
+    return (np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+def days_to_ordinals(days: np.ndarray) -> np.ndarray:
+    return (np.asarray(days, dtype='datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL).astype(np.int32)
+
+
+class FeastTable:
+    """Calendar days as typed column arrays (see module docstring for dtypes)."""
+
+    __slots__ = COLUMNS
+
+    def __init__(self, **columns):
+        for name in COLUMNS:
+            setattr(self, name, np.asarray(columns[name], dtype=DTYPES[name]))
+
+    def __len__(self):
+        return len(self.date)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, str]]) -> 'FeastTable':
+        """Build from string dicts as read by csv.DictReader from any variant."""
+        parsed = [row for row in map(parse_row, rows) if row is not None]
+        dates, names, descriptions, flags, fast_types, moons = zip(*parsed) if parsed else ([],) * 6
+        return cls(date=days_to_ordinals(np.array(dates, dtype='datetime64[D]')),
+                   feast_name=names, description=descriptions,
+                   flags=flags, fast_type=fast_types, moon_phase=moons)
+
+    def days(self) -> np.ndarray:
+        """Dates as datetime64[D]."""
+        return ordinals_to_days(self.date)
+
+    def date_strings(self) -> List[str]:
+        return np.datetime_as_string(self.days(), unit='D').tolist()
+
+    def rows(self) -> Iterator[Dict]:
+        """Rows as dicts of Python values, with the show_* flags as booleans."""
+        for i, date_str in enumerate(self.date_strings()):
+            flags = int(self.flags[i])
+            yield {
+                'date': date_str,
+                'feast_name': self.feast_name[i],
+                'description': self.description[i],
+                'show_fish': bool(flags & FISH),
+                'show_oil': bool(flags & OIL),
+                'show_strict_fast': bool(flags & STRICT),
+                'show_dairy': bool(flags & DAIRY),
+                'fast_type': int(self.fast_type[i]),
+                'moon_phase': int(self.moon_phase[i]),
+            }
+
+    def take(self, index) -> 'FeastTable':
+        """Rows selected by an index array or boolean mask."""
+        return FeastTable(**{name: getattr(self, name)[index] for name in COLUMNS})
+
+
+# CSV readers
+
+def read_csv(path: str) -> FeastTable:
+    """Read any of the CSV variants (delimiter, BOM and quoting are detected)."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = f.readline()
+        delimiter = '\t' if '\t' in header else ','
+        f.seek(0)
+        return FeastTable.from_rows(csv.DictReader(f, delimiter=delimiter))
+
+
+# CSV writers
+
+def _csv_text(rows: Iterable[List], **writer_options) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, **writer_options)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def format_csv(table: FeastTable, variant: str = 'calendar') -> str:
+    """CSV text for the table in one of the writable variants."""
+    if variant not in VARIANT_COLUMNS:
+        raise ValueError(f"Unknown CSV variant '{variant}' (choose from {', '.join(VARIANT_COLUMNS)})")
+    columns = VARIANT_COLUMNS[variant]
+    dates = table.date_strings()
+    names = table.feast_name.tolist()
+    descriptions = table.description.tolist()
+
+    if variant in ('raw', 'flags'):
+        flag_strings = [[('true' if flags & bit else 'false') for flags in table.flags.tolist()]
+                        for _, bit in _FLAG_CELLS]
+        rows = [columns] + [list(row) for row in zip(dates, names, descriptions, *flag_strings)]
+        quoting = csv.QUOTE_ALL if variant == 'raw' else csv.QUOTE_MINIMAL
+        return _csv_text(rows, quoting=quoting)
+
+    fast_types = [str(value) for value in table.fast_type.tolist()]
+    moons = table.moon_phase.tolist()
+    if variant == 'calendar':
+        moon_strings = ['' if moon == MOON_MISSING else str(moon) for moon in moons]
+        rows = [dict(zip(columns, row)) for row in zip(dates, names, descriptions, fast_types, moon_strings)]
+        return format_calendar_tsv(rows, columns)
+
+    # quoted: every string quoted, moon phase written as a bare number
+    def quote(value: str) -> str:
+        return '"' + value.replace('"', '""') + '"'
+    lines = ['\t'.join(quote(column) for column in columns)]
+    for date_str, name, description, fast_type, moon in zip(dates, names, descriptions, fast_types, moons):
+        moon_text = '""' if moon == MOON_MISSING else str(moon)
+        lines.append('\t'.join((quote(date_str), quote(name), quote(description), quote(fast_type), moon_text)))
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def write_csv(table: FeastTable, path: str, variant: str = 'calendar'):
+    text = format_csv(table, variant)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+# Compact binary format
+
+def save_npz(table: FeastTable, path: str):
+    """Save as .npz; names are stored once in a string table plus uint32 codes."""
+    arrays = {name: getattr(table, name) for name in ('date', 'flags', 'fast_type', 'moon_phase')}
+    for name in ('feast_name', 'description'):
+        values, codes = np.unique(getattr(table, name).astype(str), return_inverse=True)
+        arrays[f'{name}_values'] = values
+        arrays[f'{name}_codes'] = codes.astype(np.uint32)
+    np.savez(path, **arrays)
+
+
+def load_npz(path: str) -> FeastTable:
+    """Load a table saved with save_npz; each distinct name becomes one shared str object."""
+    with np.load(path, allow_pickle=False) as data:
+        columns = {name: data[name] for name in ('date', 'flags', 'fast_type', 'moon_phase')}
+        for name in ('feast_name', 'description'):
+            values = np.array([sys.intern(value) for value in data[f'{name}_values'].tolist()], dtype=object)
+            columns[name] = values[data[f'{name}_codes']] if len(values) else np.array([], dtype=object)
+    return FeastTable(**columns)
+
+
+def load(path: str) -> FeastTable:
+    """Read a table from .npz or any CSV variant, chosen by file extension."""
+    if path.endswith('.npz'):
+        return load_npz(path)
+    return read_csv(path)
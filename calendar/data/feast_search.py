@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Feast search index
+Inverted index over feast names for "every day of St. X" or "every day
+marked 'Разрешава се риба'" queries across many years.
+
+Each distinct feast name is indexed once, in three fields:
+    name    the name cleaned like clean_feast_content: † and * stripped,
+            parenthesized/bracketed annotations and trailing liturgical
+            references removed
+    notes   the text of the parenthesized and bracketed annotations
+    text    the whole line, including what cleaning drops after the
+            trailing references
+All are case-folded and split into word tokens. Term, prefix and phrase
+queries return the matching dates. The index is saved as JSON next to a
+hash of the CSV it was built from and rebuilt when that changes.
+
+update_fasts.apply_fast_rules() uses phrase queries on the text field for
+its keyword rules.
+
+Usage: python feast_search.py build [--csv ../orthodox_feasts.csv] [--index build/feast_index.json]
+       python feast_search.py query 'Разрешава се риба' [--prefix] [--field name|notes|text]
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DATA_DIR, 'raw'))
+
+from bulgarian_calendar_parser import clean_feast_content  # noqa: E402
+
+DEFAULT_CSV = os.path.join(os.path.dirname(DATA_DIR), 'orthodox_feasts.csv')
+DEFAULT_INDEX = os.path.join(DATA_DIR, 'build', 'feast_index.json')
+INDEX_VERSION = 2
+FIELDS = ('name', 'notes', 'text')
+
+ANNOTATION_RE = re.compile(r'\(([^)]*)\)|\[([^\]]*)\]')
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded word tokens; † and * are not word characters and drop out."""
+    return TOKEN_RE.findall(text.casefold())
+
+
+def normalize_fields(feast_name: str) -> Dict[str, str]:
+    """Space-joined tokens of each field for one feast name."""
+    notes = ' '.join(paren or bracket for paren, bracket in ANNOTATION_RE.findall(feast_name))
+    return {
+        'name': ' '.join(tokenize(clean_feast_content(feast_name))),
+        'notes': ' '.join(tokenize(notes)),
+        'text': ' '.join(tokenize(feast_name)),
+    }
+
+
+class FeastSearchIndex:
+    """Term -> feast name postings per field, plus the dates each name occurs on."""
+
+    def __init__(self, names: List[str], texts: Dict[str, List[str]],
+                 dates: Sequence[str] = (), name_ids: Sequence[int] = (), source: Optional[Dict] = None):
+        self.names = names
+        self.texts = texts          # field -> normalized text per name id
+        self.dates = list(dates)    # rows, sorted by date
+        self.name_ids = list(name_ids)
+        self.source = source or {}
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.postings: Dict[str, Dict[str, List[int]]] = {}
+        self.terms: Dict[str, List[str]] = {}
+        for field in FIELDS:
+            postings: Dict[str, List[int]] = {}
+            for name_id, text in enumerate(texts[field]):
+                for term in set(text.split()):
+                    postings.setdefault(term, []).append(name_id)
+            self.postings[field] = postings
+            self.terms[field] = sorted(postings)
+        self.rows_by_name: List[List[int]] = [[] for _ in names]
+        for row, name_id in enumerate(self.name_ids):
+            self.rows_by_name[name_id].append(row)
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> 'FeastSearchIndex':
+        """Index distinct feast names without dates (enough for name matching)."""
+        unique = list(dict.fromkeys(names))
+        return cls(unique, _normalize_all(unique))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str]], source: Optional[Dict] = None) -> 'FeastSearchIndex':
+        """Index (date, feast_name) rows."""
+        rows = sorted(rows, key=lambda row: row[0])
+        ids: Dict[str, int] = {}
+        name_ids = [ids.setdefault(name, len(ids)) for _, name in rows]
+        names = list(ids)
+        return cls(names, _normalize_all(names), [date for date, _ in rows], name_ids, source)
+
+    # Queries return sets of name ids
+
+    def _fields(self, field: Optional[str]) -> Sequence[str]:
+        if field is None:
+            return FIELDS
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}' (choose from {', '.join(FIELDS)})")
+        return (field,)
+
+    def term_ids(self, term: str, field: Optional[str] = None, prefix: bool = False) -> Set[int]:
+        """Names containing the token (or a token starting with it, with prefix=True)."""
+        term = term.casefold()
+        found: Set[int] = set()
+        for name in self._fields(field):
+            if not prefix:
+                found.update(self.postings[name].get(term, ()))
+                continue
+            terms = self.terms[name]
+            i = bisect.bisect_left(terms, term)
+            while i < len(terms) and terms[i].startswith(term):
+                found.update(self.postings[name][terms[i]])
+                i += 1
+        return found
+
+    def match_ids(self, query: str, field: Optional[str] = None, prefix: bool = False) -> Set[int]:
+        """Names containing every token of the query (the last one as a prefix, with prefix=True)."""
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+        found = None
+        for i, token in enumerate(tokens):
+            ids = self.term_ids(token, field, prefix and i == len(tokens) - 1)
+            found = ids if found is None else found & ids
+            if not found:
+                break
+        return found
+
+    def phrase_ids(self, phrase: str, field: Optional[str] = None) -> Set[int]:
+        """Names containing the tokens of the phrase next to each other, in order."""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return set()
+        needle = ' ' + ' '.join(tokens) + ' '
+        candidates = self.match_ids(phrase, field)
+        return {name_id for name_id in candidates
+                if any(needle in ' ' + self.texts[name][name_id] + ' ' for name in self._fields(field))}
+
+    def matching_names(self, phrase: str, field: Optional[str] = None) -> Set[str]:
+        return {self.names[name_id] for name_id in self.phrase_ids(phrase, field)}
+
+    def rows(self, name_ids: Iterable[int]) -> List[Tuple[str, str]]:
+        """(date, feast_name) rows for the names, by date."""
+        rows = sorted(row for name_id in name_ids for row in self.rows_by_name[name_id])
+        return [(self.dates[row], self.names[self.name_ids[row]]) for row in rows]
+
+    def search(self, query: str, field: Optional[str] = None, prefix: bool = False,
+               phrase: bool = False) -> List[Tuple[str, str]]:
+        ids = self.phrase_ids(query, field) if phrase else self.match_ids(query, field, prefix)
+        return self.rows(ids)
+
+    # Persistence
+
+    def save(self, path: str):
+        data = {
+            'version': INDEX_VERSION,
+            'source': self.source,
+            'names': self.names,
+            'texts': self.texts,
+            'dates': self.dates,
+            'name_ids': self.name_ids,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeastSearchIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported index version {data.get('version')}")
+        return cls(data['names'], data['texts'], data['dates'], data['name_ids'], data['source'])
+
+
+def _normalize_all(names: List[str]) -> Dict[str, List[str]]:
+    texts: Dict[str, List[str]] = {field: [] for field in FIELDS}
+    for name in names:
+        for field, text in normalize_fields(name).items():
+            texts[field].append(text)
+    return texts
+
+
+def file_sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_index(csv_path: str = DEFAULT_CSV) -> FeastSearchIndex:
+    """Index a feast CSV (any variant feast_schema reads) or .npz table."""
+    from feast_schema import load
+
+    table = load(csv_path)
+    source = {'path': os.path.abspath(csv_path), 'sha256': file_sha256(csv_path)}
+    return FeastSearchIndex.from_rows(zip(table.date_strings(), table.feast_name.tolist()), source)
+
+
+def load_or_build(csv_path: str = DEFAULT_CSV, index_path: str = DEFAULT_INDEX) -> FeastSearchIndex:
+    """The saved index if it was built from the current CSV, otherwise a rebuilt (and saved) one."""
+    try:
+        index = FeastSearchIndex.load(index_path)
+        if index.source.get('sha256') == file_sha256(csv_path):
+            return index
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    index = build_index(csv_path)
+    index.save(index_path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search feast names across years.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command in ('build', 'query'):
+        sub = subparsers.add_parser(command)
+        sub.add_argument('--csv', default=DEFAULT_CSV, help='feast CSV or .npz table to index')
+        sub.add_argument('--index', default=DEFAULT_INDEX, help='saved index file')
+        if command == 'query':
+            sub.add_argument('query')
+            sub.add_argument('--field', choices=FIELDS, help='search one field only')
+            sub.add_argument('--prefix', action='store_true', help='match the last word as a prefix')
+            sub.add_argument('--phrase', action='store_true', help='words must be adjacent and in order')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        index = build_index(args.csv)
+        index.save(args.index)
+        print(f"Indexed {len(index.dates)} days, {len(index.names)} distinct names "
+              f"in {time.perf_counter() - start:.2f} s -> {args.index}")
+        return
+
+    index = load_or_build(args.csv, args.index)
+    start = time.perf_counter()
+    rows = index.search(args.query, args.field, args.prefix, args.phrase)
+    elapsed = time.perf_counter() - start
+    for date, name in rows:
+        print(f"{date}\t{name}")
+    print(f"{len(rows)} days ({elapsed * 1000:.3f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
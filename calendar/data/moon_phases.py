@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Moon phase backends with a common interface.
+
+    phases(dates, backend='fast') -> numpy array of phase codes 0-7
+
+0: New Moon, 1: Waxing Crescent, 2: First Quarter, 3: Waxing Gibbous,
+4: Full Moon, 5: Waning Gibbous, 6: Last Quarter, 7: Waning Crescent
+
+Backends, from cheapest to most precise:
+    fast     mean lunation from a reference new moon, no ephemeris
+    ephem    new moons from ephem, looked up in a cached lunation table
+    astropy  Sun-Moon ecliptic elongation from astropy ephemerides
+
+ephem and astropy are only imported when their backend is used. For
+machines without network access, configure_astropy(offline=True) (or
+CALENDAR_ASTROPY_OFFLINE=1) stops astropy from downloading IERS tables and
+can pin a local IERS-A file and ephemeris.
+
+With a cache_dir, phases() and lunation() keep every computed value in a
+PhaseCache keyed by (backend, date), so already computed years are only
+read back from disk.
+
+Usage: python moon_phases.py compare 2025-01-01 2025-12-31 [--backends fast ephem astropy] [--offline]
+"""
+
+import argparse
+import bisect
+import datetime
+import json
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+LUNATION_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.lunation_cache')
+PHASE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.phase_cache')
+
+# Upper bounds of the moon age (days) for codes 0-7; anything older is a new moon again
+AGE_THRESHOLDS = np.array([1.84566, 5.53699, 9.22831, 12.91963, 16.61096, 20.30228, 23.99361, 27.68493])
+_CODES_BY_BUCKET = np.array([0, 1, 2, 3, 4, 5, 6, 7, 0], dtype=np.int8)
+
+# ephem dates count days from 1899-12-31 12:00 UT
+_EPHEM_EPOCH = np.datetime64('1899-12-31T12:00', 'm')
+
+
+def to_days(dates) -> np.ndarray:
+    """Convert dates (datetime.date, 'YYYY-MM-DD' strings or datetime64) to datetime64[D]."""
+    return np.asarray(dates, dtype='datetime64[D]').reshape(-1)
+
+
+def phase_code_from_lunation(lunation: float):
+    """Phase code 0-7 for a lunation fraction (0 = new moon, 1 = next new moon)."""
+    if lunation < 0:
+        lunation += 1
+    age = lunation * 29.53
+    if age < 1.84566:
+        return 0  # New Moon
+    elif age < 5.53699:
+        return 1  # Waxing Crescent
+    elif age < 9.22831:
+        return 2  # First Quarter
+    elif age < 12.91963:
+        return 3  # Waxing Gibbous
+    elif age < 16.61096:
+        return 4  # Full Moon
+    elif age < 20.30228:
+        return 5  # Waning Gibbous
+    elif age < 23.99361:
+        return 6  # Last Quarter
+    elif age < 27.68493:
+        return 7  # Waning Crescent
+    else:
+        return 0  # New Moon
+
+
+def phase_codes_from_lunation(lunation: np.ndarray) -> np.ndarray:
+    """Array version of phase_code_from_lunation."""
+    lunation = np.where(lunation < 0, lunation + 1, lunation)
+    age = lunation * 29.53
+    return _CODES_BY_BUCKET[np.searchsorted(AGE_THRESHOLDS, age, side='right')]
+
+
+# fast backend
+
+def fast_lunation(dates) -> np.ndarray:
+    """
+    Mean lunation approximation: moon age from a reference new moon (2000-01-06).
+
+    This is the model of processed/moon_phase_script.py, but with the Julian day
+    taken directly from the date. The K1/K2/K3 formula in that script lands 122.5
+    days off, which shifts its phases by about 4.4 days (122.5 mod 29.53).
+    """
+    days = to_days(dates)
+    jd = days.astype(np.int64) + 2440587.5  # Julian Day at 00:00 UT
+    ip = (jd - 2451550.1) / 29.530588853
+    ip -= np.floor(ip)
+    return ip
+
+
+def fast_phases(dates) -> np.ndarray:
+    return phase_codes_from_lunation(fast_lunation(dates))
+
+
+# ephem backend
+
+def compute_new_moons(start_year: int, end_year: int) -> list:
+    """Sorted new moon instants (ephem dates) bracketing every day of start_year..end_year."""
+    import ephem
+
+    first = ephem.Date(datetime.date(start_year, 1, 1))
+    last = ephem.Date(datetime.date(end_year + 1, 1, 1))
+    new_moons = [float(ephem.previous_new_moon(first))]
+    while new_moons[-1] <= last:
+        new_moons.append(float(ephem.next_new_moon(new_moons[-1])))
+    return new_moons
+
+
+def load_new_moons(start_year: int, end_year: int, cache_dir=LUNATION_CACHE_DIR) -> list:
+    """compute_new_moons with an on-disk JSON cache per year range (cache_dir=None disables it)."""
+    if cache_dir is None:
+        return compute_new_moons(start_year, end_year)
+    cache_file = os.path.join(cache_dir, f'new_moons_{start_year}_{end_year}.json')
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+    new_moons = compute_new_moons(start_year, end_year)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(new_moons, f)
+    return new_moons
+
+
+class LunationTable:
+    """Phase codes looked up from a precomputed list of new moons instead of per-day root finding."""
+
+    def __init__(self, start_year: int, end_year: int, cache_dir=LUNATION_CACHE_DIR):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.new_moons = load_new_moons(start_year, end_year, cache_dir)
+
+    def _check_range(self, date: datetime.date):
+        if not self.start_year <= date.year <= self.end_year:
+            raise ValueError(f"{date} is outside the lunation table ({self.start_year}-{self.end_year})")
+
+    def _ephem_day(self, date: datetime.date) -> float:
+        self._check_range(date)
+        return (date - datetime.date(1899, 12, 31)).days - 0.5
+
+    def phase_code(self, date: datetime.date):
+        """Binary search for the lunation containing date."""
+        d = self._ephem_day(date)
+        i = bisect.bisect_right(self.new_moons, d)
+        pnm, nnm = self.new_moons[i - 1], self.new_moons[i]
+        return phase_code_from_lunation((d - pnm) / (nnm - pnm))
+
+    def phase_codes(self, dates):
+        """Phase codes for many dates; sorted input is handled with a single linear sweep."""
+        codes = []
+        i = 1
+        prev = None
+        for date in dates:
+            d = self._ephem_day(date)
+            if prev is not None and d < prev:
+                i = 1  # Unsorted input: restart the sweep
+            while self.new_moons[i] <= d:
+                i += 1
+            pnm, nnm = self.new_moons[i - 1], self.new_moons[i]
+            codes.append(phase_code_from_lunation((d - pnm) / (nnm - pnm)))
+            prev = d
+        return codes
+
+    def lunation_array(self, days: np.ndarray) -> np.ndarray:
+        """Vectorized lunation fractions for a datetime64[D] array."""
+        years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+        if len(days) and (years.min() < self.start_year or years.max() > self.end_year):
+            raise ValueError(f"dates outside the lunation table ({self.start_year}-{self.end_year})")
+        d = (days - _EPHEM_EPOCH).astype(np.float64) / 1440.0
+        new_moons = np.asarray(self.new_moons)
+        i = np.searchsorted(new_moons, d, side='right')
+        pnm, nnm = new_moons[i - 1], new_moons[i]
+        return (d - pnm) / (nnm - pnm)
+
+    def phase_codes_array(self, days: np.ndarray) -> np.ndarray:
+        """Vectorized lookup for a datetime64[D] array."""
+        return phase_codes_from_lunation(self.lunation_array(days))
+
+
+def ephem_lunation(dates, cache_dir=LUNATION_CACHE_DIR) -> np.ndarray:
+    """Lunation fractions between the surrounding ephem new moons."""
+    days = to_days(dates)
+    if len(days) == 0:
+        return np.array([], dtype=np.float64)
+    years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    table = LunationTable(int(years.min()), int(years.max()), cache_dir)
+    return table.lunation_array(days)
+
+
+def ephem_phases(dates, cache_dir=LUNATION_CACHE_DIR) -> np.ndarray:
+    """New moon based phases using ephem through a LunationTable."""
+    if len(to_days(dates)) == 0:
+        return np.array([], dtype=np.int8)
+    return phase_codes_from_lunation(ephem_lunation(dates, cache_dir))
+
+
+# astropy backend
+
+ASTROPY_SETTINGS = {
+    'offline': os.environ.get('CALENDAR_ASTROPY_OFFLINE', '') not in ('', '0'),
+    'iers_file': os.environ.get('CALENDAR_IERS_FILE') or None,   # pinned IERS-A table (finals2000A.all)
+    'ephemeris': os.environ.get('CALENDAR_EPHEMERIS') or 'builtin',  # or a local JPL .bsp file
+}
+_astropy_ready = False
+
+
+def configure_astropy(offline: bool = None, iers_file: str = None, ephemeris: str = None):
+    """Change the astropy settings; they are applied on the next astropy computation."""
+    global _astropy_ready
+    for name, value in (('offline', offline), ('iers_file', iers_file), ('ephemeris', ephemeris)):
+        if value is not None:
+            ASTROPY_SETTINGS[name] = value
+    _astropy_ready = False
+
+
+def setup_astropy():
+    """Import astropy and apply ASTROPY_SETTINGS (once)."""
+    global _astropy_ready
+    if _astropy_ready:
+        return
+    from astropy.coordinates import solar_system_ephemeris
+    from astropy.utils import iers
+    from astropy.utils.data import conf as data_conf
+
+    if ASTROPY_SETTINGS['offline']:
+        # Bundled IERS-B tables only; dates past them get a warning instead of a download
+        iers.conf.auto_download = False
+        iers.conf.iers_degraded_accuracy = 'warn'
+        data_conf.allow_internet = False
+    if ASTROPY_SETTINGS['iers_file']:
+        iers.earth_orientation_table.set(iers.IERS_A.open(ASTROPY_SETTINGS['iers_file']))
+    solar_system_ephemeris.set(ASTROPY_SETTINGS['ephemeris'])
+    _astropy_ready = True
+
+
+def astropy_lunation(dates) -> np.ndarray:
+    """Sun-Moon ecliptic longitude difference as a fraction 0..1, from astropy."""
+    setup_astropy()
+    from astropy.coordinates import get_body, GeocentricTrueEcliptic
+    from astropy.time import Time
+    import astropy.units as u
+
+    times = Time(to_days(dates))
+    moon_ecl = get_body('moon', times).transform_to(GeocentricTrueEcliptic(obstime=times))
+    sun_ecl = get_body('sun', times).transform_to(GeocentricTrueEcliptic(obstime=times))
+    lon_diff = (moon_ecl.lon - sun_ecl.lon).wrap_at(360 * u.deg).to(u.deg).value
+    return np.atleast_1d(lon_diff % 360) / 360.0
+
+
+def astropy_phases(dates) -> np.ndarray:
+    """Phase codes from the astropy elongation, bucketed with the same age thresholds."""
+    if len(to_days(dates)) == 0:
+        return np.array([], dtype=np.int8)
+    return phase_codes_from_lunation(astropy_lunation(dates))
+
+
+# Calendar moon_phase column (index.html): 1 new, 2 first quarter, 3 full, 4 last quarter, 0 none.
+# A day is near a major phase when its lunation fraction is within this
+# distance of 0, 0.25, 0.5 or 0.75; this is how the served calendar was made.
+MAJOR_PHASE_THRESHOLD = 0.1
+
+
+def get_phase_numbers(lunation) -> np.ndarray:
+    """Major phase number (1-4) for lunation fractions near a major phase, 0 elsewhere."""
+    lunation = np.asarray(lunation, dtype=np.float64)
+    conditions = [
+        (np.abs(lunation - 0) < MAJOR_PHASE_THRESHOLD) | (np.abs(lunation - 1) < MAJOR_PHASE_THRESHOLD),
+        np.abs(lunation - 0.25) < MAJOR_PHASE_THRESHOLD,
+        np.abs(lunation - 0.5) < MAJOR_PHASE_THRESHOLD,
+        np.abs(lunation - 0.75) < MAJOR_PHASE_THRESHOLD,
+    ]
+    return np.select(conditions, [1, 2, 3, 4], default=0)
+
+
+def mark_last_phase_days(numbers) -> np.ndarray:
+    """Keep a phase number only on the last day of each run (the day before it changes)."""
+    numbers = np.asarray(numbers)
+    is_last = np.ones(len(numbers), dtype=bool)
+    is_last[:-1] = numbers[:-1] != numbers[1:]
+    return np.where((numbers != 0) & is_last, numbers, 0)
+
+
+def calendar_markers(dates, backend: str = 'astropy', cache_dir=None) -> np.ndarray:
+    """
+    Calendar moon_phase values for consecutive dates. One day past the last
+    date is computed too, so the last date is only marked if its run ends.
+    """
+    days = to_days(dates)
+    if len(days) == 0:
+        return np.array([], dtype=np.int8)
+    lookahead = np.append(days, days[-1] + 1)
+    numbers = get_phase_numbers(lunation(lookahead, backend, cache_dir))
+    return mark_last_phase_days(numbers)[:-1].astype(np.int8)
+
+
+BACKENDS = {
+    'fast': fast_phases,
+    'ephem': ephem_phases,
+    'astropy': astropy_phases,
+}
+LUNATION_BACKENDS = {
+    'fast': fast_lunation,
+    'ephem': ephem_lunation,
+    'astropy': astropy_lunation,
+}
+
+
+class PhaseCache:
+    """
+    Computed lunation fractions on disk, keyed by (backend, date).
+
+    Each backend has a directory with one float64 .npy file per year, indexed
+    by day of year; NaN marks days not computed yet. Only missing days are
+    passed to the backend, and only years that gained values are rewritten.
+    """
+
+    def __init__(self, backend: str, cache_dir=PHASE_CACHE_DIR):
+        if backend not in LUNATION_BACKENDS:
+            raise ValueError(f"Unknown moon phase backend '{backend}' (choose from {', '.join(LUNATION_BACKENDS)})")
+        self.backend = backend
+        self.directory = os.path.join(cache_dir, self.key(backend))
+
+    @staticmethod
+    def key(backend: str) -> str:
+        """Cache directory name; astropy results also depend on the ephemeris."""
+        if backend == 'astropy' and ASTROPY_SETTINGS['ephemeris'] != 'builtin':
+            name = os.path.splitext(os.path.basename(ASTROPY_SETTINGS['ephemeris']))[0]
+            return f'astropy-{name}'
+        return backend
+
+    def _path(self, year: int) -> str:
+        return os.path.join(self.directory, f'{year}.npy')
+
+    def _load(self, year: int) -> np.ndarray:
+        try:
+            return np.load(self._path(year))
+        except (FileNotFoundError, ValueError):
+            days_in_year = int((np.datetime64(f'{year + 1}-01-01') - np.datetime64(f'{year}-01-01')).astype(np.int64))
+            return np.full(days_in_year, np.nan)
+
+    def _save(self, year: int, values: np.ndarray):
+        os.makedirs(self.directory, exist_ok=True)
+        # Per process, as parallel workers can save the same year
+        tmp_path = f'{self._path(year)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, values)
+        os.replace(tmp_path, self._path(year))
+
+    def lunation(self, dates) -> np.ndarray:
+        days = to_days(dates)
+        result = np.full(len(days), np.nan)
+        if len(days) == 0:
+            return result
+        years = days.astype('datetime64[Y]')
+        day_of_year = (days - years).astype(np.int64)
+        years = years.astype(np.int64) + 1970
+
+        tables = {}
+        for year in np.unique(years).tolist():
+            tables[year] = self._load(year)
+            in_year = years == year
+            result[in_year] = tables[year][day_of_year[in_year]]
+
+        missing = np.isnan(result)
+        if missing.any():
+            result[missing] = LUNATION_BACKENDS[self.backend](days[missing])
+            for year in np.unique(years[missing]).tolist():
+                in_year = years == year
+                tables[year][day_of_year[in_year]] = result[in_year]
+                self._save(year, tables[year])
+        return result
+
+
+def lunation(dates, backend: str = 'fast', cache_dir=None) -> np.ndarray:
+    """Lunation fractions 0..1 for dates using the selected backend, through a PhaseCache if cache_dir is set."""
+    if cache_dir is not None:
+        return PhaseCache(backend, cache_dir).lunation(dates)
+    try:
+        func = LUNATION_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown moon phase backend '{backend}' (choose from {', '.join(LUNATION_BACKENDS)})")
+    return func(dates)
+
+
+def phases(dates, backend: str = 'fast', cache_dir=None) -> np.ndarray:
+    """Phase codes 0-7 for dates using the selected backend, through a PhaseCache if cache_dir is set."""
+    if cache_dir is not None:
+        if len(to_days(dates)) == 0:
+            return np.array([], dtype=np.int8)
+        return phase_codes_from_lunation(lunation(dates, backend, cache_dir))
+    try:
+        func = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown moon phase backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    return func(dates)
+
+
+def compare(dates, backends=('fast', 'ephem', 'astropy')) -> Dict:
+    """
+    Run several backends over the same dates.
+
+    Returns per-backend timings (seconds per 10k dates) and the days where
+    the backends do not all agree, with each backend's code for that day.
+    """
+    days = to_days(dates)
+    results = {}
+    timings = {}
+    for name in backends:
+        start = time.perf_counter()
+        results[name] = phases(days, name)
+        elapsed = time.perf_counter() - start
+        timings[name] = elapsed * 10000 / len(days) if len(days) else 0.0
+
+    disagreements: List[Dict] = []
+    if backends and len(days):
+        stacked = np.vstack([results[name] for name in backends])
+        differ = np.flatnonzero((stacked != stacked[0]).any(axis=0))
+        for i in differ:
+            day = {'date': str(days[i])}
+            day.update({name: int(results[name][i]) for name in backends})
+            disagreements.append(day)
+
+    return {
+        'dates': len(days),
+        'seconds_per_10k': timings,
+        'disagreements': disagreements,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Moon phase backends')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compare_parser = subparsers.add_parser('compare', help='report days where backends disagree')
+    compare_parser.add_argument('start', help='first date, YYYY-MM-DD')
+    compare_parser.add_argument('end', help='last date, YYYY-MM-DD')
+    compare_parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    compare_parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    compare_parser.add_argument('--offline', action='store_true', help='never let astropy download IERS data')
+    args = parser.parse_args()
+    if args.offline:
+        configure_astropy(offline=True)
+
+    dates = np.arange(np.datetime64(args.start, 'D'), np.datetime64(args.end, 'D') + 1)
+    report = compare(dates, args.backends)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"Compared {report['dates']} dates")
+    for name, seconds in report['seconds_per_10k'].items():
+        print(f"  {name:8s} {seconds:.4f} s per 10k dates")
+    print(f"Days with disagreement: {len(report['disagreements'])}")
+    for day in report['disagreements'][:20]:
+        codes = ', '.join(f"{name}={day[name]}" for name in args.backends)
+        print(f"  {day['date']}: {codes}")
+    if len(report['disagreements']) > 20:
+        print(f"  ... {len(report['disagreements']) - 20} more (use --json for all)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,33 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-from astropy.coordinates import get_body, GeocentricTrueEcliptic
-from astropy.time import Time
-import astropy.units as u
 import numpy as np
 
-def get_moon_phase(time: Time) -> float:
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from calendar_tsv import write_calendar_tsv  # noqa: E402
+import moon_phases  # noqa: E402
+from moon_phases import get_phase_numbers, mark_last_phase_days  # noqa: E402
+from stage_metrics import Profiler, add_profile_arguments  # noqa: E402
+
+# astropy is imported on first use (see moon_phases.setup_astropy)
+
+def get_moon_phase(time) -> float:
     """Return lunar phase as fraction 0..1 (0=new, 0.25=first quarter, 0.5=full, 0.75=last quarter)."""
+    moon_phases.setup_astropy()
+    from astropy.coordinates import get_body, GeocentricTrueEcliptic
+    import astropy.units as u
+
     moon_ecl = get_body('moon', time).transform_to(GeocentricTrueEcliptic(obstime=time))
     sun_ecl = get_body('sun', time).transform_to(GeocentricTrueEcliptic(obstime=time))
     lon_diff = (moon_ecl.lon - sun_ecl.lon).wrap_at(360 * u.deg).to(u.deg).value
     return (lon_diff % 360) / 360.0
 
+def get_moon_phases(times) -> np.ndarray:
+    """Vectorized get_moon_phase: one ephemeris evaluation and frame transform for all times."""
+    return np.atleast_1d(get_moon_phase(times))
+
 # Function to determine the moon phase number based on major phases
 def get_phase_number(phase):
     # Threshold for phase matching (0.1 radians ~ 5.7 degrees, reasonable for daily check)
@@ -26,63 +43,84 @@ def get_phase_number(phase):
     else:
         return 0  # No major phase change
 
-# Read the CSV file (tab-separated) with quoting preserved
-df = pd.read_csv('orthodox_feasts.csv', sep='\t', quoting=1, keep_default_na=False)
-
-# Sort by date to ensure chronological order
-df['date'] = pd.to_datetime(df['date'])
-df = df.sort_values('date').reset_index(drop=True)
-
-# Calculate moon phase for each date (first pass - get all phases)
-all_phases = []
-for date in df['date']:
-    current_phase = get_phase_number(get_moon_phase(Time(date)))
-    all_phases.append(current_phase)
-
-# Second pass: only mark the last day of each phase (when it's about to change)
-phases = []
-for i in range(len(all_phases)):
-    # Check if next day has a different phase (and current day has a phase)
-    if all_phases[i] != 0:
-        # If this is the last row or next day has different phase, mark it
-        if i == len(all_phases) - 1 or all_phases[i + 1] != all_phases[i]:
-            phases.append(all_phases[i])
+def compute_phases_per_row(dates) -> list:
+    """Original day-by-day computation, kept for verifying the batched path."""
+    from astropy.time import Time
+
+    # Calculate moon phase for each date (first pass - get all phases)
+    all_phases = []
+    for date in dates:
+        current_phase = get_phase_number(get_moon_phase(Time(date)))
+        all_phases.append(current_phase)
+
+    # Second pass: only mark the last day of each phase (when it's about to change)
+    phases = []
+    for i in range(len(all_phases)):
+        # Check if next day has a different phase (and current day has a phase)
+        if all_phases[i] != 0:
+            # If this is the last row or next day has different phase, mark it
+            if i == len(all_phases) - 1 or all_phases[i + 1] != all_phases[i]:
+                phases.append(all_phases[i])
+            else:
+                phases.append(0)
         else:
             phases.append(0)
-    else:
-        phases.append(0)
-
-df['moon_phase'] = phases
-
-# Convert date back to string format for writing
-df['date'] = df['date'].dt.strftime('%Y-%m-%d')
-
-# Write back to the CSV file with quotes for all columns except date
-# We'll write manually to control quoting per column
-with open('orthodox_feasts.csv', 'w', encoding='utf-8') as f:
-    # Write header
-    headers = df.columns.tolist()
-    f.write('\t'.join(headers) + '\n')
-
-    # Write data rows
-    for _, row in df.iterrows():
-        values = []
-        for col in headers:
-            val = row[col]
-            # Handle NaN/None values - convert to empty string
-            if pd.isna(val) or val is None:
-                val = ''
-            else:
-                val = str(val)
+    return phases
 
-            # Add quotes for all columns except 'date'
-            if col == 'date':
-                values.append(val)
-            else:
-                # Escape any existing quotes in the value
-                val = val.replace('"', '""')
-                values.append(f'"{val}"')
-        f.write('\t'.join(values) + '\n')
+def compute_phases(dates, cache_dir=None) -> np.ndarray:
+    """Batched computation over the whole date column, through the on-disk phase cache if cache_dir is set."""
+    if len(dates) == 0:
+        return np.array([], dtype=int)
+    days = pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+    all_phases = get_phase_numbers(moon_phases.lunation(days, 'astropy', cache_dir))
+    return mark_last_phase_days(all_phases)
+
+def main():
+    parser = argparse.ArgumentParser(description='Update the moon_phase column of a calendar TSV using astropy.')
+    parser.add_argument('input', nargs='?', default='orthodox_feasts.csv')
+    parser.add_argument('output', nargs='?', help='defaults to rewriting the input file')
+    parser.add_argument('--per-row', action='store_true',
+                        help='use the slow one-date-at-a-time computation (for verification)')
+    parser.add_argument('--offline', action='store_true', help='never let astropy download IERS data')
+    parser.add_argument('--iers-file', help='pinned IERS-A table (finals2000A.all) to use instead of downloads')
+    parser.add_argument('--ephemeris', help="'builtin' (default) or a local JPL .bsp file")
+    parser.add_argument('--cache-dir', default=moon_phases.PHASE_CACHE_DIR, help='on-disk phase cache')
+    parser.add_argument('--no-cache', action='store_true', help='recompute every date')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, 'moon_phase_astropy')
+    output_file = args.output or args.input
+    moon_phases.configure_astropy(offline=args.offline or None, iers_file=args.iers_file, ephemeris=args.ephemeris)
+
+    # Read the CSV file (tab-separated) with quoting preserved
+    with profiler.stage('read') as stage:
+        df = pd.read_csv(args.input, sep='\t', quoting=1, keep_default_na=False)
+
+        # Sort by date to ensure chronological order
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.sort_values('date').reset_index(drop=True)
+        stage['rows_out'] = len(df)
+
+    with profiler.stage('phases', rows_in=len(df)) as stage:
+        if args.per_row:
+            phases = compute_phases_per_row(df['date'])
+        else:
+            phases = compute_phases(df['date'], None if args.no_cache else args.cache_dir)
+        stage['rows_out'] = len(phases)
+
+    df['moon_phase'] = phases
+
+    with profiler.stage('write', rows_in=len(df)) as stage:
+        # Convert date back to string format for writing
+        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+
+        # Write back to the CSV file with quotes for all columns except date
+        write_calendar_tsv(df, output_file)
+        stage['rows_out'] = len(df)
+
+    print(f"Moon phases updated in {output_file}")
+    print(f"Total phase changes recorded: {sum(1 for p in phases if p != 0)}")
+    profiler.write()
 
-print("Moon phases updated in orthodox_feasts.csv")
-print(f"Total phase changes recorded: {sum(1 for p in phases if p != 0)}")
+if __name__ == "__main__":
+    main()
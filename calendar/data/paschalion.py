@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Orthodox Paschalion
+Orthodox Easter (Pascha) by the Julian computus, returned as a Gregorian date,
+plus the Pascha-dependent periods used by the fasting rules.
+
+Usage: python paschalion.py 2025 [2026 ...]
+"""
+
+import sys
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Tuple
+
+# Pascha-relative periods as (first offset, last offset) in days, inclusive.
+# Periods that end on a fixed date use None and are resolved in moveable_periods().
+PASCHA_PERIODS = {
+    'cheese_week': (-55, -49),        # Monday to Cheesefare Sunday, the week before Great Lent
+    'great_lent': (-48, 1),           # Clean Monday through Bright Monday
+    'first_week_strict': (-48, -44),  # Clean Monday to Friday of the first week
+    'holy_week_strict': (-6, -4),     # Holy Monday to Holy Wednesday
+    'apostles_fast': (56, None),      # Sunday of All Saints to June 29
+}
+
+
+def julian_to_gregorian_offset(year: int) -> int:
+    """Days between the Julian and Gregorian calendars for dates from March of year."""
+    return year // 100 - year // 400 - 2
+
+
+@lru_cache(maxsize=None)
+def orthodox_easter(year: int) -> date:
+    """Gregorian date of Orthodox Easter for the given year."""
+    a = year % 4
+    b = year % 7
+    c = year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = divmod(d + e + 114, 31)
+    return date(year, month, day + 1) + timedelta(days=julian_to_gregorian_offset(year))
+
+
+def orthodox_easter_array(years):
+    """Vectorized orthodox_easter: array of years -> datetime64[D] array."""
+    import numpy as np
+
+    years = np.asarray(years, dtype=np.int64)
+    a = years % 4
+    b = years % 7
+    c = years % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = np.divmod(d + e + 114, 31)
+    offset = years // 100 - years // 400 - 2
+    return ((years - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+            + (month - 1).astype('timedelta64[M]')).astype('datetime64[D]') \
+        + (day + offset).astype('timedelta64[D]')
+
+
+@lru_cache(maxsize=None)
+def moveable_periods(year: int) -> Dict[str, Tuple[date, date]]:
+    """First and last date of each Pascha-dependent period in the given year."""
+    pascha = orthodox_easter(year)
+    periods = {}
+    for name, (first, last) in PASCHA_PERIODS.items():
+        start = pascha + timedelta(days=first)
+        end = date(year, 6, 29) if last is None else pascha + timedelta(days=last)
+        periods[name] = (start, end)
+    return periods
+
+
+def main():
+    years = [int(arg) for arg in sys.argv[1:]] or [date.today().year]
+    for year in years:
+        print(f"{year}: Pascha {orthodox_easter(year).isoformat()}")
+        for name, (start, end) in moveable_periods(year).items():
+            print(f"  {name}: {start.isoformat()} - {end.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
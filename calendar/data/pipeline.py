@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Calendar Data Pipeline
+Single entry point for the data flow that used to be run script by script:
+
+    raw/YYYY.txt --parse--> build/parsed/YYYY.csv --fasts--> build/fasts/YYYY.csv
+                 --moon--> build/moon/YYYY.csv --merge--> orthodox_feasts.csv
+
+Stages run per year. Each stage is fingerprinted by the content hash of its
+inputs, its code and its parameters; a stage whose fingerprint is unchanged
+since the last run is skipped. Editing one year's text rebuilds only that
+year, and a rule change rebuilds the fasts stage but skips the moon stage for
+every year whose fast flags did not actually change.
+
+The moon stage marks major phases like new-with-moon/moon_phase_astropy.py,
+which made the served calendar (moon_phases.calendar_markers); the default
+astropy backend reproduces its moon_phase column. The ephem and astropy
+backends go through the on-disk phase cache (moon_phases.PhaseCache), so a
+forced rebuild does not recompute known dates.
+
+Usage: python pipeline.py [--raw-dir raw] [--output build/orthodox_feasts.csv]
+                          [--moon-backend astropy|fast|ephem] [--offline] [--shards DIR] [--force]
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import sys
+from typing import Callable, Dict, List
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DATA_DIR, 'raw'))
+sys.path.insert(0, os.path.join(DATA_DIR, 'processed'))
+sys.path.insert(0, DATA_DIR)
+
+import feast_record  # noqa: E402
+import feast_search  # noqa: E402
+import moon_phases  # noqa: E402
+import paschalion  # noqa: E402
+from calendar_tsv import write_calendar_tsv  # noqa: E402
+from feast_record import read_feasts, write_feasts  # noqa: E402
+import update_fasts  # noqa: E402
+from bulgarian_calendar_parser import BulgarianCalendarParser  # noqa: E402
+
+DEFAULT_RAW_DIR = os.path.join(DATA_DIR, 'raw')
+DEFAULT_BUILD_DIR = os.path.join(DATA_DIR, 'build')
+STATE_FILE = 'pipeline_state.json'
+CALENDAR_FIELDNAMES = ['date', 'feast_name', 'description', 'fast_type', 'moon_phase']
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def source_hash(*modules) -> str:
+    """Hash of the source files of the modules a stage depends on."""
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(file_hash(module.__file__).encode('ascii'))
+    return digest.hexdigest()
+
+
+def read_rows(path: str) -> List[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def write_rows(rows: List[Dict], path: str, fieldnames: List[str]):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+# Stage implementations: (input paths, output path, params) -> None
+
+def write_feast_file(feasts: List[feast_record.Feast], path: str):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        write_feasts(feasts, f)
+    os.replace(tmp_path, path)
+
+
+def run_parse(inputs: List[str], output: str, params: Dict):
+    parser = BulgarianCalendarParser()
+    feasts = sorted(parser.iter_feasts(inputs[0]), key=lambda feast: feast.date)
+    write_feast_file(feasts, output)
+
+
+def run_fasts(inputs: List[str], output: str, params: Dict):
+    feasts = update_fasts.apply_fast_rules(read_feasts(inputs[0]))
+    write_feast_file(feasts, output)
+
+
+def run_moon(inputs: List[str], output: str, params: Dict):
+    feasts = read_feasts(inputs[0])
+    # The fast backend is cheaper to recompute than to read back
+    cache_dir = None if params['moon_backend'] == 'fast' else moon_phases.PHASE_CACHE_DIR
+    markers = moon_phases.calendar_markers([feast.date for feast in feasts], params['moon_backend'], cache_dir)
+    out = []
+    for feast, marker in zip(feasts, markers):
+        out.append({
+            'date': feast.date,
+            'feast_name': feast.feast_name,
+            'description': feast.description,
+            'fast_type': update_fasts.fast_type(feast.flags),
+            'moon_phase': int(marker),
+        })
+    write_rows(out, output, CALENDAR_FIELDNAMES)
+
+
+class Stage:
+    """A per-year pipeline stage: reads its inputs, writes one output file."""
+
+    def __init__(self, name: str, run: Callable, inputs: Callable, code: Callable, params=()):
+        self.name = name
+        self.run = run
+        self.inputs = inputs   # (pipeline, year) -> list of input paths
+        self.code = code       # () -> hash of the code and rule tables the stage depends on
+        self.params = params   # names of pipeline parameters that affect the output
+
+    def output(self, pipeline, year: str) -> str:
+        return os.path.join(pipeline.build_dir, self.name, f'{year}.csv')
+
+
+def _moon_code_hash() -> str:
+    # fast_type() lives in feast_record, so editing a rule in update_fasts does not rerun this stage
+    return source_hash(moon_phases, feast_record)
+
+
+def _rules_hash() -> str:
+    rules = json.dumps([update_fasts.FAST_RULES, update_fasts.KEYWORD_RULES], ensure_ascii=False, sort_keys=True)
+    # feast_search cleans names with the parser's patterns for the keyword rules
+    code = source_hash(update_fasts, feast_record, feast_search, paschalion,
+                       sys.modules[BulgarianCalendarParser.__module__])
+    return hashlib.sha256((rules + code).encode('utf-8')).hexdigest()
+
+
+STAGES = [
+    Stage('parse', run_parse,
+          inputs=lambda pipeline, year: [pipeline.raw_files[year]],
+          code=lambda: source_hash(sys.modules[BulgarianCalendarParser.__module__], feast_record, paschalion)),
+    Stage('fasts', run_fasts,
+          inputs=lambda pipeline, year: [STAGES[0].output(pipeline, year)],
+          code=_rules_hash),
+    Stage('moon', run_moon,
+          inputs=lambda pipeline, year: [STAGES[1].output(pipeline, year)],
+          code=_moon_code_hash,
+          params=('moon_backend', 'astropy')),
+]
+
+
+class Pipeline:
+    def __init__(self, raw_dir: str = DEFAULT_RAW_DIR, build_dir: str = DEFAULT_BUILD_DIR,
+                 moon_backend: str = 'astropy'):
+        self.raw_dir = raw_dir
+        self.build_dir = build_dir
+        self.params = {
+            'moon_backend': moon_backend,
+            # Offline mode, the IERS table and the ephemeris all change the astropy phases
+            'astropy': dict(moon_phases.ASTROPY_SETTINGS) if moon_backend == 'astropy' else None,
+        }
+        self.raw_files = {
+            os.path.splitext(os.path.basename(path))[0]: path
+            for path in sorted(glob.glob(os.path.join(raw_dir, '[0-9][0-9][0-9][0-9].txt')))
+        }
+        self.state_path = os.path.join(build_dir, STATE_FILE)
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+
+    def save_state(self):
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+
+    def fingerprint(self, stage: Stage, year: str, code_hash: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(stage.name.encode('utf-8'))
+        digest.update(code_hash.encode('ascii'))
+        digest.update(json.dumps({name: self.params[name] for name in stage.params}, sort_keys=True).encode('utf-8'))
+        for path in stage.inputs(self, year):
+            digest.update(file_hash(path).encode('ascii'))
+        return digest.hexdigest()
+
+    def run(self, force: bool = False) -> Dict[str, List[str]]:
+        """Bring every stage up to date; returns the years rebuilt per stage."""
+        rebuilt = {stage.name: [] for stage in STAGES}
+        for stage in STAGES:
+            os.makedirs(os.path.join(self.build_dir, stage.name), exist_ok=True)
+            code_hash = stage.code()
+            for year in self.raw_files:
+                key = f'{stage.name}:{year}'
+                output = stage.output(self, year)
+                fingerprint = self.fingerprint(stage, year, code_hash)
+                if not force and self.state.get(key) == fingerprint and os.path.exists(output):
+                    continue
+                stage.run(stage.inputs(self, year), output, self.params)
+                self.state[key] = fingerprint
+                rebuilt[stage.name].append(year)
+            print(f"{stage.name}: rebuilt {len(rebuilt[stage.name])} of {len(self.raw_files)} years")
+        # Forget years whose raw file is gone
+        stage_names = {stage.name for stage in STAGES}
+        for key in list(self.state):
+            stage_name, _, year = key.partition(':')
+            if stage_name in stage_names and year not in self.raw_files:
+                del self.state[key]
+        self.save_state()
+        return rebuilt
+
+    def merge(self, output_file: str) -> bool:
+        """Concatenate the per-year moon outputs into the final calendar TSV if any changed."""
+        inputs = [STAGES[-1].output(self, year) for year in self.raw_files]
+        fingerprint = hashlib.sha256(''.join(file_hash(path) for path in inputs).encode('ascii')).hexdigest()
+        key = f'merge:{os.path.abspath(output_file)}'
+        if self.state.get(key) == fingerprint and os.path.exists(output_file):
+            print(f"merge: {output_file} is up to date")
+            return False
+        rows = []
+        for path in inputs:
+            rows.extend(read_rows(path))
+        write_calendar_tsv(rows, output_file, CALENDAR_FIELDNAMES)
+        self.state[key] = fingerprint
+        self.save_state()
+        print(f"merge: wrote {len(rows)} rows to {output_file}")
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally rebuild the calendar data.')
+    parser.add_argument('--raw-dir', default=DEFAULT_RAW_DIR, help='directory with YYYY.txt calendar files')
+    parser.add_argument('--build-dir', default=DEFAULT_BUILD_DIR)
+    parser.add_argument('--output', default=os.path.join(DEFAULT_BUILD_DIR, 'orthodox_feasts.csv'))
+    parser.add_argument('--moon-backend', default='astropy', choices=list(moon_phases.BACKENDS),
+                        help='astropy reproduces the served calendar; fast and ephem are approximations')
+    parser.add_argument('--offline', action='store_true', help='never let astropy download IERS data')
+    parser.add_argument('--shards', metavar='DIR', help='also write per-month JSON shards to DIR')
+    parser.add_argument('--force', action='store_true', help='rebuild every stage')
+    args = parser.parse_args()
+    if args.offline:
+        moon_phases.configure_astropy(offline=True)
+
+    pipeline = Pipeline(args.raw_dir, args.build_dir, args.moon_backend)
+    if not pipeline.raw_files:
+        print(f"No YYYY.txt files in {args.raw_dir}")
+        sys.exit(1)
+    os.makedirs(args.build_dir, exist_ok=True)
+    pipeline.run(force=args.force)
+    changed = pipeline.merge(args.output)
+
+    if args.shards and (changed or not os.path.isdir(args.shards)):
+        from build_month_shards import build_month_shards
+        build_month_shards(args.output, args.shards)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,88 @@
+import argparse
 import csv
 import datetime
+import os
+import sys
 import ephem
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from moon_phases import LUNATION_CACHE_DIR, LunationTable, phase_code_from_lunation  # noqa: E402
+from stage_metrics import Profiler, add_profile_arguments  # noqa: E402
+
 def get_phase_code(year: int, month: int, day: int):
     """
     Returns an integer 0-7 for the moon phase, matching the logic of moon_phase_script.py:
     0: New Moon, 1: Waxing Crescent, 2: First Quarter, 3: Waxing Gibbous,
     4: Full Moon, 5: Waning Gibbous, 6: Last Quarter, 7: Waning Crescent
+
+    Solves for the surrounding new moons directly; LunationTable gives the same
+    codes from a precomputed table.
     """
     date = ephem.Date(datetime.date(year, month, day))
     nnm = ephem.next_new_moon(date)
     pnm = ephem.previous_new_moon(date)
     lunation = (date - pnm) / (nnm - pnm)  # 0-1
-    if lunation < 0:
-        lunation += 1
-    age = lunation * 29.53
-    if age < 1.84566:
-        return 0  # New Moon
-    elif age < 5.53699:
-        return 1  # Waxing Crescent
-    elif age < 9.22831:
-        return 2  # First Quarter
-    elif age < 12.91963:
-        return 3  # Waxing Gibbous
-    elif age < 16.61096:
-        return 4  # Full Moon
-    elif age < 20.30228:
-        return 5  # Waning Gibbous
-    elif age < 23.99361:
-        return 6  # Last Quarter
-    elif age < 27.68493:
-        return 7  # Waning Crescent
-    else:
-        return 0  # New Moon
+    return phase_code_from_lunation(lunation)
+
+def parse_date(date_str: str) -> datetime.date:
+    year, month, day = map(int, date_str.split('-'))
+    return datetime.date(year, month, day)
+
+def main():
+    parser = argparse.ArgumentParser(description='Add an ephem_moon_phase_change column to a calendar CSV.')
+    # parser.add_argument('input', nargs='?', default='orthodox_feasts.csv')
+    parser.add_argument('input', nargs='?', default='FromExcel.csv')
+    parser.add_argument('output', nargs='?', default='orthodox_feasts_with_ephem_moon.csv')
+    parser.add_argument('--no-cache', action='store_true', help='do not read or write the lunation cache')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, 'moon_phase_ephem_script')
+    input_file = args.input
+    output_file = args.output
+
+    with profiler.stage('read') as stage, open(input_file, 'r', encoding='utf-8-sig') as infile:
+        reader = csv.DictReader(infile)
+        # Remove any existing 'ephem_moon_phase_change' column to avoid duplicates
+        fieldnames = [fn for fn in reader.fieldnames if fn != 'ephem_moon_phase_change'] + ['ephem_moon_phase_change']
+        rows = list(reader)
+        stage['rows_out'] = len(rows)
+
+    with profiler.stage('phases', rows_in=len(rows)) as stage:
+        dates = {}
+        for row in rows:
+            date_str = row['date']
+            try:
+                dates[date_str] = parse_date(date_str)
+            except Exception as e:
+                print(f"Error processing date {date_str}: {e}")
+
+        codes = {}
+        if dates:
+            sorted_dates = sorted(set(dates.values()))
+            table = LunationTable(sorted_dates[0].year, sorted_dates[-1].year,
+                                  None if args.no_cache else LUNATION_CACHE_DIR)
+            codes = dict(zip(sorted_dates, table.phase_codes(sorted_dates)))
+        stage['rows_out'] = len(codes)
 
-# input_file = 'orthodox_feasts.csv'
-input_file = 'FromExcel.csv'
-output_file = 'orthodox_feasts_with_ephem_moon.csv'
+    with profiler.stage('write', rows_in=len(rows)) as stage, \
+            open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        writer.writeheader()
 
-with open(input_file, 'r', encoding='utf-8-sig') as infile, open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-    reader = csv.DictReader(infile)
-    # Remove any existing 'ephem_moon_phase_change' column to avoid duplicates
-    fieldnames = [fn for fn in reader.fieldnames if fn != 'ephem_moon_phase_change'] + ['ephem_moon_phase_change']
-    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-    writer.writeheader()
+        prev_phase = None
+        for row in rows:
+            date = dates.get(row['date'])
+            phase_code = codes[date] if date is not None else None
+            if prev_phase is None or phase_code != prev_phase:
+                row['ephem_moon_phase_change'] = phase_code
+            else:
+                row['ephem_moon_phase_change'] = -1
+            prev_phase = phase_code
+            writer.writerow(row)
+        stage['rows_out'] = len(rows)
 
-    prev_phase = None
-    for row in reader:
-        date_str = row['date']
-        try:
-            year, month, day = map(int, date_str.split('-'))
-            phase_code = get_phase_code(year, month, day)
-        except Exception as e:
-            phase_code = None
-            print(f"Error processing date {date_str}: {e}")
-        if prev_phase is None or phase_code != prev_phase:
-            row['ephem_moon_phase_change'] = phase_code
-        else:
-            row['ephem_moon_phase_change'] = -1
-        prev_phase = phase_code
-        writer.writerow(row)
+    print(f"Done. Output written to {output_file}")
+    profiler.write()
 
-print(f"Done. Output written to {output_file}")
+if __name__ == "__main__":
+    main()
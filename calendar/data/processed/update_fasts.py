@@ -1,124 +1,189 @@
+import argparse
 import csv
-from datetime import datetime, timedelta
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feast_record import (DAIRY, DAIRY_COLUMN, FISH, FLAG_COLUMNS, OIL, STRICT,  # noqa: E402
+                          fast_type_from_flags, read_feasts, write_feasts)
+from feast_search import FeastSearchIndex  # noqa: E402
+from paschalion import moveable_periods  # noqa: E402
+from stage_metrics import Profiler, add_profile_arguments  # noqa: E402
+
+WEDNESDAY_FRIDAY = (2, 4)  # Wednesday=2, Friday=4
+ALL_DAYS = tuple(range(7))
+
+# Date rules, applied in order (later rules win). Each rule covers 'start' through
+# 'end' (month, day) or 'days_after' days past 'start', or a Pascha-dependent
+# 'period' from paschalion.PASCHA_PERIODS, inclusive, on the given weekdays, and
+# forces the listed flags on or off.
+FAST_RULES = [
+    # Rule 1: If Wednesday or Friday, set show_fish to true
+    {'start': (1, 1), 'end': (12, 31), 'weekdays': WEDNESDAY_FRIDAY, 'set': {'show_oil': False, 'show_fish': True}},
+    # Rule 2: Great Lent, Clean Monday and next 49 days set show_oil to true (March 03 in 2025)
+    {'period': 'great_lent', 'set': {'show_oil': True}},
+    # Rule 3: From August 01 and next 15 days set show_oil to true
+    {'start': (8, 1), 'days_after': 15, 'set': {'show_oil': True}},
+    # Rule 4: For Jan 05 and August 29 set show_strict_fast to true
+    {'start': (1, 5), 'end': (1, 5), 'set': {'show_strict_fast': True}},
+    {'start': (8, 29), 'end': (8, 29), 'set': {'show_strict_fast': True}},
+    # Rule 5: For November 15, 17, 18, 19 set show_oil to true
+    {'start': (11, 15), 'end': (11, 15), 'set': {'show_oil': True}},
+    {'start': (11, 17), 'end': (11, 19), 'set': {'show_oil': True}},
+    # Rule 6: From November 15 to December 24 - only oil in the first week, then fish
+    {'start': (11, 15), 'end': (11, 20), 'set': {'show_oil': True}},
+    {'start': (11, 21), 'end': (11, 23), 'set': {'show_oil': False, 'show_fish': True}},
+    {'start': (11, 24), 'end': (12, 10), 'weekdays': WEDNESDAY_FRIDAY, 'set': {'show_oil': True, 'show_fish': True}},
+    {'start': (11, 24), 'end': (12, 10), 'weekdays': (0, 1, 3, 5, 6), 'set': {'show_oil': False, 'show_fish': True}},
+    {'start': (12, 20), 'end': (12, 24), 'set': {'show_oil': True}},
+    # Rule 7: For December 20, 21, 22, 23, 24 set show_oil to true
+    {'start': (12, 20), 'end': (12, 24), 'set': {'show_oil': True}},
+    # Rule 8: First week of Great Lent, set show_strict_fast to true (March 03 to March 07 in 2025)
+    {'period': 'first_week_strict', 'set': {'show_strict_fast': True}},
+    # Rule 9: Holy Monday to Holy Wednesday, set show_strict_fast to true (April 14 to April 16 in 2025)
+    {'period': 'holy_week_strict', 'set': {'show_strict_fast': True}},
+    # Rule 10: Apostles' fast to June 29 set show_fish to true (June 15 to June 29 in 2025)
+    {'period': 'apostles_fast', 'set': {'show_fish': True}},
+    # Cheese week: dairy and fish, no meat, set show_dairy and show_fish to true (February 24 to March 02 in 2025)
+    {'period': 'cheese_week', 'set': {'show_dairy': True, 'show_fish': True}},
+]
+
+# Feast name rules, applied after the date rules. The keyword is a phrase query
+# on feast_search's text field (case-folded, whole words, anywhere in the line)
+KEYWORD_RULES = [
+    {'keyword': 'Разрешава се риба', 'set': {'show_fish': True, 'show_strict_fast': False, 'show_oil': False}},
+    {'keyword': 'Блажи се', 'set': {'show_fish': False, 'show_strict_fast': False, 'show_oil': False}},
+]
+
+FLAG_BITS = dict(FLAG_COLUMNS, **{DAIRY_COLUMN: DAIRY})
+
+
+def rule_masks(assignments):
+    """(keep_mask, set_mask) for a rule: flags = (flags & keep_mask) | set_mask."""
+    touched = 0
+    set_mask = 0
+    for column, value in assignments.items():
+        touched |= FLAG_BITS[column]
+        if value:
+            set_mask |= FLAG_BITS[column]
+    return ~touched & 0xFF, set_mask
+
+
+def rule_days(rule, year):
+    """First and last date covered by a date rule in the given year."""
+    if 'period' in rule:
+        return moveable_periods(year)[rule['period']]
+    start = date(year, *rule['start'])
+    if 'days_after' in rule:
+        return start, start + timedelta(days=rule['days_after'])
+    return start, date(year, *rule['end'])
+
+
+def compile_fast_rules(year, rules=FAST_RULES):
+    """
+    Compile date rules into per-day-of-year masks for one year.
+
+    Returns two bytearrays indexed by day of year (0 = Jan 1); a day's flags
+    become (flags & keep[doy]) | set[doy], which is the same as applying
+    every matching rule in order.
+    """
+    jan_1 = date(year, 1, 1)
+    days_in_year = (date(year + 1, 1, 1) - jan_1).days
+    first_weekday = jan_1.weekday()
+    keep = bytearray([0xFF]) * days_in_year
+    setm = bytearray(days_in_year)
+
+    for rule in rules:
+        rule_keep, rule_set = rule_masks(rule['set'])
+        weekdays = rule.get('weekdays', ALL_DAYS)
+        start, end = rule_days(rule, year)
+        first = max((start - jan_1).days, 0)
+        last = min((end - jan_1).days, days_in_year - 1)
+        for doy in range(first, last + 1):
+            if (first_weekday + doy) % 7 in weekdays:
+                keep[doy] &= rule_keep
+                setm[doy] = (setm[doy] & rule_keep) | rule_set
+    return keep, setm
+
+
+# fast_type column value of a flag bitfield (shared with feast_schema)
+fast_type = fast_type_from_flags
+
+
+def apply_fast_rules(feasts, rules=FAST_RULES, keyword_rules=KEYWORD_RULES, index=None):
+    """
+    Update the flags of Feast records in place using rule tables compiled once per year.
+
+    Keyword rules are looked up once per distinct feast name in a
+    feast_search index (built from the records unless one is passed in).
+    """
+    compiled = {}
+    if index is None:
+        index = FeastSearchIndex.from_names(feast.feast_name for feast in feasts)
+    keyword_masks = [(index.matching_names(rule['keyword'], 'text'), rule_masks(rule['set']))
+                     for rule in keyword_rules]
+
+    for feast in feasts:
+        date_str = feast.date
+        year, month, day = int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])
+        if year not in compiled:
+            compiled[year] = (date(year, 1, 1).toordinal(), compile_fast_rules(year, rules))
+        jan_1, (keep, setm) = compiled[year]
+        doy = date(year, month, day).toordinal() - jan_1
+
+        flags = (feast.flags & keep[doy]) | setm[doy]
+
+        feast_name = feast.feast_name
+        for names, (rule_keep, rule_set) in keyword_masks:
+            if feast_name in names:
+                flags = (flags & rule_keep) | rule_set
 
-def update_orthodox_feasts():
-    input_file = 'orthodox_feasts_original.csv'
-    output_file = 'orthodox_feasts.csv'
+        # Rule 11: If feast_name contains '†', downgrade the fast level
+        if '†' in feast_name:
+            if flags & STRICT:
+                flags = (flags & ~STRICT) | OIL
+            elif flags & OIL:
+                flags = (flags & ~OIL) | FISH
+            elif flags & FISH:
+                flags &= ~FISH
 
-    # Read the CSV file
-    rows = []
-    with open(input_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            rows.append(row)
-
-    # Update each row according to the rules
-    for row in rows:
-        date_str = row['date']
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-
-        # Rule 1: If Wednesday or Friday, set show_fish to true
-        if date_obj.weekday() in [2, 4]:  # Wednesday=2, Friday=4
-            row['show_oil'] = 'false'
-            row['show_fish'] = 'true'
-
-        # Rule 2: From March 03 and next 49 days set show_oil to true
-        march_03 = datetime(date_obj.year, 3, 3)
-        if march_03 <= date_obj <= march_03 + timedelta(days=49):
-            row['show_oil'] = 'true'
-
-        # Rule 3: From August 01 and next 15 days set show_oil to true
-        august_01 = datetime(date_obj.year, 8, 1)
-        if august_01 <= date_obj <= august_01 + timedelta(days=15):
-            row['show_oil'] = 'true'
-
-        # Rule 4: For Jan 05 and August 29 set show_strict_fast to true
-        if (date_obj.month == 1 and date_obj.day == 5) or \
-                (date_obj.month == 8 and date_obj.day == 29):
-            row['show_strict_fast'] = 'true'
-
-        # Rule 5: For November 15, 17, 18, 19 set show_oil to true
-        if date_obj.month == 11 and date_obj.day in [15, 17, 18, 19]:
-            row['show_oil'] = 'true'
-
-        # Rule 6: From November 15 to December 24 - only oil in the first week, then fish
-        nov_15 = datetime(date_obj.year, 11, 15)
-        nov_20 = datetime(date_obj.year, 11, 20)
-        if nov_15 <= date_obj <= nov_20:
-            row['show_oil'] = 'true'
-
-        nov_21 = datetime(date_obj.year, 11, 21)
-        nov_23 = datetime(date_obj.year, 11, 23)
-        if nov_21 <= date_obj <= nov_23:
-            row['show_oil'] = 'false'
-            row['show_fish'] = 'true'
-
-        nov_24 = datetime(date_obj.year, 11, 24)
-        dec_19 = datetime(date_obj.year, 12, 10)
-        if nov_24 <= date_obj <= dec_19:
-            if date_obj.weekday() in [2, 4]:  # Wednesday=2, Friday=4
-                row['show_oil'] = 'true'
-            else:
-                row['show_oil'] = 'false'
-            row['show_fish'] = 'true'
-
-        dec_20 = datetime(date_obj.year, 12, 20)
-        dec_24 = datetime(date_obj.year, 12, 24)
-        if dec_20 <= date_obj <= dec_24:
-            row['show_oil'] = 'true'
-        # End of Rule 6
-
-        # Rule 7: For December 20, 21, 22, 23, 24 set show_oil to true
-        if date_obj.month == 12 and date_obj.day in [20, 21, 22, 23, 24]:
-            row['show_oil'] = 'true'
-
-        # Rule 8: For March 03 to March 07, set show_strict_fast to true
-        march_07 = datetime(date_obj.year, 3, 7)
-        if march_03 <= date_obj <= march_07:
-            row['show_strict_fast'] = 'true'
-
-        # Rule 9: For April 14 to April 16, set show_strict_fast to true
-        april_14 = datetime(date_obj.year, 4, 14)
-        april_16 = datetime(date_obj.year, 4, 16)
-        if april_14 <= date_obj <= april_16:
-            row['show_strict_fast'] = 'true'
-
-        # Rule 10: From June 15 to June 29 set show_fish to true
-        june_15 = datetime(date_obj.year, 6, 15)
-        june_29 = datetime(date_obj.year, 6, 29)
-        if june_15 <= date_obj <= june_29:
-            row['show_fish'] = 'true'
-
-        if 'Разрешава се риба' in row['feast_name']:
-           row['show_fish'] = 'true'
-           row['show_strict_fast'] = 'false'
-           row['show_oil'] = 'false'
-
-        if 'Блажи се' in row['feast_name']:
-           row['show_fish'] = 'false'
-           row['show_strict_fast'] = 'false'
-           row['show_oil'] = 'false'
+        feast.flags = flags
+    return feasts
 
-        # Rule 11: If feast_name contains '†', downgrade the fast level
-        if '†' in row['feast_name']:
-            if row['show_strict_fast'] == 'true':
-              row['show_strict_fast'] = 'false'
-              row['show_oil'] = 'true'
-            elif row['show_oil'] == 'true':
-              row['show_oil'] = 'false'
-              row['show_fish'] = 'true'
-            elif row['show_fish'] == 'true':
-              row['show_fish'] = 'false'
 
+def update_orthodox_feasts(input_file='orthodox_feasts_original.csv', output_file='orthodox_feasts.csv',
+                           profiler=None):
+    profiler = profiler or Profiler.from_env('update_fasts')
+
+    # Read the CSV file
+    with profiler.stage('read') as stage:
+        feasts = read_feasts(input_file)
+        stage['rows_out'] = len(feasts)
+
+    # Update each feast according to the rules
+    with profiler.stage('rules', rows_in=len(feasts)) as stage:
+        apply_fast_rules(feasts)
+        stage['rows_out'] = len(feasts)
 
     # Write the updated data back to CSV
-    with open(output_file, 'w', newline='', encoding='utf-8') as file:
-        fieldnames = ['date', 'feast_name', 'description', 'show_fish', 'show_oil', 'show_strict_fast']
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    with profiler.stage('write', rows_in=len(feasts)) as stage:
+        with open(output_file, 'w', newline='', encoding='utf-8') as file:
+            write_feasts(feasts, file, quoting=csv.QUOTE_MINIMAL)
+        stage['rows_out'] = len(feasts)
+
+    print(f"Updated {len(feasts)} records in {output_file}")
+    profiler.write()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply the fasting rules to the show_* columns of a feast CSV.')
+    parser.add_argument('input', nargs='?', default='orthodox_feasts_original.csv')
+    parser.add_argument('output', nargs='?', default='orthodox_feasts.csv')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    update_orthodox_feasts(args.input, args.output, Profiler.from_args(args, 'update_fasts'))
 
-    print(f"Updated {len(rows)} records in {output_file}")
 
 if __name__ == "__main__":
-    update_orthodox_feasts()
\ No newline at end of file
+    main()
@@ -4,13 +4,93 @@ Bulgarian Orthodox Calendar Parser
 Converts Bulgarian Orthodox calendar text file to CSV format.
 
 Usage: python parse_calendar.py input.txt output.csv
+       python parse_calendar.py --batch 'yearly/*.txt' orthodox_feasts.csv [--workers N]
 """
 
+import argparse
 import csv
+import glob
+import heapq
+import logging
+import os
 import re
+import shutil
 import sys
-from datetime import datetime
-from typing import List, Dict, Optional
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feast_record import FIELDNAMES, FISH, OIL, STRICT, Feast, write_feasts  # noqa: E402
+from paschalion import orthodox_easter  # noqa: E402
+from stage_metrics import Profiler, add_profile_arguments  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+MONTH_NAMES = ('Януари', 'Февруари', 'Март', 'Април', 'Май', 'Юни',
+               'Юли', 'Август', 'Септември', 'Октомври', 'Ноември', 'Декември')
+MONTH_RE = re.compile(r'^(' + '|'.join(MONTH_NAMES) + r')')
+# Month header with the year, e.g. "Януари - 2025 година"
+YEAR_HEADER_RE = re.compile(r'^(?:' + '|'.join(MONTH_NAMES) + r')\s*[-–]\s*(\d{4})\s+година')
+DAY_RE = re.compile(r'^(\d{2})\s+(.+)')
+TWO_DIGITS_RE = re.compile(r'^\d{2}')
+PROGRESS_EVERY = 50
+DEFAULT_YEAR = 2025  # Used when a file has no "<month> - <year> година" headers
+
+# Strict fast days: fixed (month, day) dates and offsets in days from Pascha
+STRICT_FAST_DATES = [(8, 29)]  # Beheading of St. John the Baptist
+STRICT_FAST_PASCHA_OFFSETS = [-2]  # Good Friday
+
+
+# Patterns for cleaning up feast content, applied in order. Each one removes
+# its matches from what the previous ones left; the last collapses whitespace.
+CLEANUP_PATTERNS = [
+    r'†\s*',  # Remove † symbol
+    r'\*\s*',  # Remove * symbol
+    r'\([^)]*\)',  # Remove parentheses content
+    r'\[[^\]]*\]',  # Remove square bracket content
+    r'Гл\.\s*\d+.*$',  # Remove chapter references
+    r'утр\.\s*ев\..*$',  # Remove liturgical references
+    r'лит\.\s*ев\..*$',  # Remove liturgical references
+    r'ап\..*$',  # Remove apostolic references
+    r'с\.\s*\d+.*$',  # Remove page references
+    r'стр\.\s*\d+.*$',  # Remove page references
+    r'т\.\s*\d+.*$',  # Remove tome references
+    r'вечерта.*$',  # Remove evening service references
+    r'сутринта.*$',  # Remove morning service references
+    r'\s+',  # Multiple spaces to single space
+]
+# Compiled once. They stay separate rules rather than one alternation: a
+# single leftmost-match pass would not remove the same text as applying
+# them one after another ("[a (b] c)" keeps "[a", "Г†л. 4" becomes empty).
+CLEANUP_RES = [re.compile(pattern, re.IGNORECASE) for pattern in CLEANUP_PATTERNS[:-1]]
+WHITESPACE_RE = re.compile(CLEANUP_PATTERNS[-1])
+
+
+def clean_feast_content(content: str) -> str:
+    """Feast content without symbols and liturgical annotations."""
+    cleaned = content.strip()
+    for pattern in CLEANUP_RES:
+        cleaned = pattern.sub('', cleaned)
+    return WHITESPACE_RE.sub(' ', cleaned).strip()
+
+
+def clean_feast_names(names: Iterable[str]) -> List[str]:
+    """
+    clean_feast_content() for a whole list or column of feast names.
+
+    Each distinct name is cleaned once; fixed feasts repeat every year, so
+    a multi-year column has few distinct names.
+    """
+    cache = {}
+    cleaned = []
+    for name in names:
+        result = cache.get(name)
+        if result is None:
+            result = cache[name] = clean_feast_content(name)
+        cleaned.append(result)
+    return cleaned
 
 
 class BulgarianCalendarParser:
@@ -34,35 +114,11 @@ class BulgarianCalendarParser:
         }
         
         # Patterns for cleaning up feast content
-        self.cleanup_patterns = [
-            r'†\s*',  # Remove † symbol
-            r'\*\s*',  # Remove * symbol
-            r'\([^)]*\)',  # Remove parentheses content
-            r'\[[^\]]*\]',  # Remove square bracket content
-            r'Гл\.\s*\d+.*$',  # Remove chapter references
-            r'утр\.\s*ев\..*$',  # Remove liturgical references
-            r'лит\.\s*ев\..*$',  # Remove liturgical references
-            r'ап\..*$',  # Remove apostolic references
-            r'с\.\s*\d+.*$',  # Remove page references
-            r'стр\.\s*\d+.*$',  # Remove page references
-            r'т\.\s*\d+.*$',  # Remove tome references
-            r'вечерта.*$',  # Remove evening service references
-            r'сутринта.*$',  # Remove morning service references
-            r'\s+',  # Multiple spaces to single space
-        ]
+        self.cleanup_patterns = CLEANUP_PATTERNS
     
     def clean_feast_content(self, content: str) -> str:
         """Clean feast content by removing liturgical annotations."""
-        cleaned = content.strip()
-        
-        # Apply cleanup patterns
-        for pattern in self.cleanup_patterns[:-1]:  # All except the last one
-            cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-        
-        # Handle multiple spaces separately
-        cleaned = re.sub(self.cleanup_patterns[-1], ' ', cleaned)
-        
-        return cleaned.strip()
+        return clean_feast_content(content)
     
     def is_wednesday_or_friday(self, date_str: str) -> bool:
         """Check if date falls on Wednesday or Friday."""
@@ -75,79 +131,92 @@ class BulgarianCalendarParser:
     
     def is_strict_fast_day(self, date_str: str) -> bool:
         """Check if date is a strict fast day."""
-        return date_str in ['2025-04-25', '2025-08-29']
-    
-    def parse_file(self, filename: str) -> List[Dict[str, str]]:
-        """Parse the Bulgarian calendar text file."""
-        feasts = []
-        current_month = ''
+        try:
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return False
+        if (date_obj.month, date_obj.day) in STRICT_FAST_DATES:
+            return True
+        pascha = orthodox_easter(date_obj.year)
+        return any(date_obj == pascha + timedelta(days=offset) for offset in STRICT_FAST_PASCHA_OFFSETS)
+
+    def iter_feasts(self, filename: str,
+                    progress: Optional[Callable[[int], None]] = None) -> Iterator[Feast]:
+        """
+        Stream feasts from a Bulgarian calendar text file, one row at a time.
+
+        The file is read line by line, so memory use does not grow with the
+        input. progress, if given, is called with the running feast count
+        every PROGRESS_EVERY feasts; otherwise progress goes to the logger.
+        The year is taken from the month headers ("Януари - 2025 година").
+        """
         current_month_number = ''
         current_day = ''
-        current_year = 2025
-        
+        current_year = DEFAULT_YEAR
+        date_str = ''
+        flags = 0
+        count = 0
+
+        with open(filename, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+
+                # Check if line starts with a month name
+                month_match = MONTH_RE.match(line)
+                if month_match:
+                    current_month = month_match.group(1)
+                    current_month_number = self.month_map[current_month]
+                    year_match = YEAR_HEADER_RE.match(line)
+                    if year_match:
+                        current_year = int(year_match.group(1))
+                    logger.info(f"Processing month: {current_month} ({current_month_number})")
+                    continue
+
+                # Lines starting with two digits are never feast content
+                if TWO_DIGITS_RE.match(line):
+                    # Check if line starts with two digits (day number)
+                    day_match = DAY_RE.match(line)
+                    if day_match and current_month_number:
+                        current_day = day_match.group(1)
+                        # The date and its fasting flags are the same for every feast line of the day
+                        date_str = f"{current_year}-{current_month_number}-{current_day}"
+                        flags = 0
+                        if self.is_wednesday_or_friday(date_str):
+                            flags |= FISH | OIL
+                        if self.is_strict_fast_day(date_str):
+                            flags |= STRICT
+                    # Skip this line as it just contains day number and day of week
+                    continue
+
+                # If we have a current day and this line contains feast content
+                if current_day and current_month_number and len(line) > 3:
+                    # feast_content = self.clean_feast_content(line)
+                    count += 1
+                    # Keep original content as per requirements; description empty as per requirements
+                    yield Feast(date_str, line, '', flags)
+
+                    if count % PROGRESS_EVERY == 0:  # Progress indicator
+                        if progress:
+                            progress(count)
+                        else:
+                            logger.info(f"Processed {count} feasts...")
+
+        logger.info(f"Total feasts processed: {count}")
+
+    def parse_file(self, filename: str) -> List[Feast]:
+        """Parse the Bulgarian calendar text file."""
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
+            return list(self.iter_feasts(filename))
         except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
+            logger.error(f"Error: File '{filename}' not found.")
             return []
         except UnicodeDecodeError:
-            print(f"Error: Could not decode '{filename}'. Please ensure it's UTF-8 encoded.")
+            logger.error(f"Error: Could not decode '{filename}'. Please ensure it's UTF-8 encoded.")
             return []
-        
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check if line starts with a month name
-            month_match = re.match(r'^(Януари|Февруари|Март|Април|Май|Юни|Юли|Август|Септември|Октомври|Ноември|Декември)', line)
-            if month_match:
-                current_month = month_match.group(1)
-                current_month_number = self.month_map[current_month]
-                print(f"Processing month: {current_month} ({current_month_number})")
-                continue
-            
-            # Check if line starts with two digits (day number)
-            day_match = re.match(r'^(\d{2})\s+(.+)', line)
-            if day_match and current_month_number:
-                current_day = day_match.group(1)
-                # Skip this line as it just contains day number and day of week
-                continue
-            
-            # If we have a current day and this line contains feast content
-            if (current_day and current_month_number and line and 
-                not re.match(r'^\d{2}', line) and 
-                not re.match(r'^(Януари|Февруари|Март|Април|Май|Юни|Юли|Август|Септември|Октомври|Ноември|Декември)', line)):
-                
-                # feast_content = self.clean_feast_content(line)
-                feast_content = line.strip()  # Keep original content as per requirements
-                if feast_content and len(feast_content) > 3:
-                    date_str = f"{current_year}-{current_month_number}-{current_day}"
-                    
-                    # Apply fasting rules according to specifications
-                    show_fish = self.is_wednesday_or_friday(date_str)
-                    show_oil = self.is_wednesday_or_friday(date_str)
-                    show_strict_fast = self.is_strict_fast_day(date_str)
-                    
-                    feast = {
-                        'date': date_str,
-                        'feast_name': feast_content,
-                        'description': '',  # Empty as per requirements
-                        'show_fish': str(show_fish).lower(),
-                        'show_oil': str(show_oil).lower(),
-                        'show_strict_fast': str(show_strict_fast).lower()
-                    }
-                    
-                    feasts.append(feast)
-                    
-                    if len(feasts) % 50 == 0:  # Progress indicator
-                        print(f"Processed {len(feasts)} feasts...")
-        
-        print(f"Total feasts processed: {len(feasts)}")
-        return feasts
-    
-    def write_csv(self, feasts: List[Dict[str, str]], output_filename: str) -> bool:
+
+    def write_csv(self, feasts: List[Feast], output_filename: str) -> bool:
         """Write feasts data to CSV file."""
         if not feasts:
             print("No feast data to write.")
@@ -155,11 +224,7 @@ class BulgarianCalendarParser:
         
         try:
             with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['date', 'feast_name', 'description', 'show_fish', 'show_oil', 'show_strict_fast']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
-                
-                writer.writeheader()
-                writer.writerows(feasts)
+                write_feasts(feasts, csvfile)
                 
             print(f"Successfully wrote {len(feasts)} feasts to '{output_filename}'")
             return True
@@ -168,58 +233,153 @@ class BulgarianCalendarParser:
             print(f"Error writing CSV file: {e}")
             return False
     
-    def validate_output(self, feasts: List[Dict[str, str]]) -> None:
+    def validate_output(self, feasts: List[Feast]) -> None:
         """Validate the parsed output."""
         if not feasts:
             print("Warning: No feasts were parsed.")
             return
         
-        # Check date range
-        dates = [feast['date'] for feast in feasts]
-        min_date = min(dates)
-        max_date = max(dates)
+        # Date range, strict fast days and Wednesday/Friday fasting in one pass
+        # (calendar_check.py validates a whole generated file)
+        min_date = max_date = feasts[0].date
+        strict_fast_days = []
+        wed_fri_count = 0
+        for feast in feasts:
+            if feast.date < min_date:
+                min_date = feast.date
+            elif feast.date > max_date:
+                max_date = feast.date
+            if feast.flags & STRICT:
+                strict_fast_days.append(feast)
+            if feast.flags & FISH:
+                wed_fri_count += 1
+
         print(f"Date range: {min_date} to {max_date}")
         
-        # Check for specific strict fast days
-        strict_fast_days = [feast for feast in feasts if feast['show_strict_fast'] == 'true']
         print(f"Strict fast days found: {len(strict_fast_days)}")
         for day in strict_fast_days:
-            print(f"  {day['date']}: {day['feast_name'][:50]}...")
+            print(f"  {day.date}: {day.feast_name[:50]}...")
         
-        # Check Wednesday/Friday fasting
-        wed_fri_days = [feast for feast in feasts if feast['show_fish'] == 'true']
-        print(f"Wednesday/Friday fasting days: {len(wed_fri_days)}")
+        print(f"Wednesday/Friday fasting days: {wed_fri_count}")
+
+
+def expand_inputs(pattern: str) -> List[str]:
+    """Yearly .txt files from a directory or a glob pattern, sorted by name."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.txt')
+    return sorted(glob.glob(pattern))
+
+
+def _parse_to_sorted_csv(args: Tuple[str, str]) -> Tuple[str, str, int]:
+    """Worker: parse one yearly file into a date-sorted temporary CSV."""
+    input_file, temp_file = args
+    logger.setLevel(logging.WARNING)  # Per-month progress from many workers is just noise
+    feasts = BulgarianCalendarParser().parse_file(input_file)
+    feasts.sort(key=lambda feast: feast.date)  # Stable: keeps the order of feasts within a day
+    with open(temp_file, 'w', newline='', encoding='utf-8') as csvfile:
+        write_feasts(feasts, csvfile)
+    return input_file, temp_file, len(feasts)
+
+
+def parse_batch(input_files: List[str], output_filename: str, workers: Optional[int] = None) -> int:
+    """
+    Parse many yearly files across a process pool into one date-sorted CSV.
+
+    Each worker writes its year to a temporary CSV; these are then merged
+    by date while streaming, so at most one row per year is held in memory.
+    Returns the number of feasts written.
+    """
+    temp_dir = tempfile.mkdtemp(prefix='calendar_parse_')
+    try:
+        jobs = [(input_file, os.path.join(temp_dir, f'{i:05d}.csv'))
+                for i, input_file in enumerate(input_files)]
+        temp_files = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for input_file, temp_file, count in pool.map(_parse_to_sorted_csv, jobs):
+                logger.info(f"Parsed {input_file}: {count} feasts")
+                if count:
+                    temp_files.append(temp_file)
+
+        handles = [open(temp_file, 'r', newline='', encoding='utf-8') for temp_file in temp_files]
+        try:
+            readers = [csv.reader(handle) for handle in handles]
+            for reader in readers:
+                next(reader)  # Header
+            total = 0
+            with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+                writer.writerow(FIELDNAMES)
+                # Rows stay as lists of cells: the date is the first one
+                for row in heapq.merge(*readers, key=lambda row: row[0]):
+                    writer.writerow(row)
+                    total += 1
+        finally:
+            for handle in handles:
+                handle.close()
+        return total
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 def main():
     """Main function to run the parser."""
-    if len(sys.argv) != 3:
-        print("Usage: python parse_calendar.py input.txt output.csv")
-        print("Example: python parse_calendar.py 2025.txt orthodox_feasts.csv")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    
+    arg_parser = argparse.ArgumentParser(
+        description='Convert Bulgarian Orthodox calendar text files to CSV.',
+        epilog='Example: python parse_calendar.py 2025.txt orthodox_feasts.csv')
+    arg_parser.add_argument('input', help='calendar text file, or a directory/glob of yearly files with --batch')
+    arg_parser.add_argument('output', help='output CSV file')
+    arg_parser.add_argument('--batch', action='store_true', help='parse many yearly files in parallel')
+    arg_parser.add_argument('--workers', type=int, default=None, help='worker processes for --batch')
+    add_profile_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    profiler = Profiler.from_args(args, 'bulgarian_calendar_parser')
+
+    input_file = args.input
+    output_file = args.output
+
     print(f"Bulgarian Orthodox Calendar Parser")
     print(f"Input file: {input_file}")
     print(f"Output file: {output_file}")
     print("-" * 50)
-    
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.batch:
+        input_files = expand_inputs(input_file)
+        if not input_files:
+            print(f"No calendar files match '{input_file}'.")
+            sys.exit(1)
+        with profiler.stage('parse_batch') as stage:
+            total = stage['rows_out'] = parse_batch(input_files, output_file, args.workers)
+        profiler.write()
+        if not total:
+            print("No feast data was parsed. Please check the input file format.")
+            sys.exit(1)
+        print(f"\nMerged {total} feasts from {len(input_files)} files into '{output_file}'.")
+        return
+
     parser = BulgarianCalendarParser()
     
     # Parse the input file
-    feasts = parser.parse_file(input_file)
+    with profiler.stage('parse') as stage:
+        feasts = parser.parse_file(input_file)
+        stage['rows_out'] = len(feasts)
     
     if not feasts:
+        profiler.write()
         print("No feast data was parsed. Please check the input file format.")
         sys.exit(1)
     
     # Validate the output
-    parser.validate_output(feasts)
+    with profiler.stage('validate', rows_in=len(feasts)):
+        parser.validate_output(feasts)
     
     # Write to CSV
-    if parser.write_csv(feasts, output_file):
+    with profiler.stage('write', rows_in=len(feasts)) as stage:
+        written = parser.write_csv(feasts, output_file)
+        stage['rows_out'] = len(feasts) if written else 0
+    profiler.write()
+    if written:
         print(f"\nConversion completed successfully!")
         print(f"CSV file '{output_file}' is ready for use with your PHP script.")
     else:
@@ -0,0 +1,180 @@
+"""
+Stage metrics
+Opt-in timing, memory and row counts for the stages of the calendar scripts,
+written as a JSON report so rebuilds can be compared over time.
+
+Enable with --profile [REPORT] on a script, or CALENDAR_PROFILE=REPORT (or
+=1 for a timestamped file under build/profile/). --cprofile or
+CALENDAR_CPROFILE=1 also runs each stage under cProfile: the top functions
+go into the report and the full stats into REPORT.<stage>.prof.
+
+Per stage the report has wall_s, cpu_s, rows_in, rows_out, rows_per_s and
+peak_rss_mb. On Linux the peak is reset before each stage, so it is the
+stage's own peak; elsewhere it is the process peak so far
+(peak_rss_scope says which).
+
+Usage: profiler = Profiler.from_args(args, 'update_fasts')
+       with profiler.stage('rules', rows_in=len(feasts)) as stage:
+           ...
+           stage['rows_out'] = len(feasts)
+       profiler.write()
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REPORT_DIR = os.path.join(DATA_DIR, 'build', 'profile')
+PROFILE_ENV = 'CALENDAR_PROFILE'
+CPROFILE_ENV = 'CALENDAR_CPROFILE'
+TOP_FUNCTIONS = 15
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process (since the last reset_peak_rss()) in MiB."""
+    # On Linux ru_maxrss survives fork/exec and so includes the parent's peak;
+    # VmHWM belongs to this process image only
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 2**10, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def reset_peak_rss() -> bool:
+    """Reset VmHWM to the current RSS (Linux 4.0+); False if the peak cannot be reset."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def top_functions(profile: cProfile.Profile, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+    """The functions with the most cumulative time, as JSON-friendly dicts."""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({function})',
+            'calls': calls,
+            'tottime_s': round(tottime, 4),
+            'cumtime_s': round(cumtime, 4),
+        })
+    rows.sort(key=lambda row: row['cumtime_s'], reverse=True)
+    return rows[:limit]
+
+
+def add_profile_arguments(parser):
+    """--profile [REPORT] and --cprofile options for an argparse parser."""
+    parser.add_argument('--profile', nargs='?', const='1', metavar='REPORT',
+                        help=f'write per-stage metrics as JSON (default under build/profile/; or set {PROFILE_ENV})')
+    parser.add_argument('--cprofile', action='store_true',
+                        help=f'also run each stage under cProfile (or set {CPROFILE_ENV}=1)')
+
+
+class Profiler:
+    """Collects per-stage metrics for one script run; does nothing unless enabled."""
+
+    def __init__(self, script: str, report: Optional[str] = None, cprofile: bool = False):
+        self.script = script
+        self.enabled = bool(report)
+        if report == '1':
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            report = os.path.join(DEFAULT_REPORT_DIR, f'{script}-{stamp}.json')
+        self.report = report
+        self.cprofile = cprofile and self.enabled
+        self.stages: List[Dict] = []
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+
+    @classmethod
+    def from_args(cls, args, script: str) -> 'Profiler':
+        """A profiler set up from add_profile_arguments() options, falling back to the environment."""
+        report = getattr(args, 'profile', None) or os.environ.get(PROFILE_ENV) or None
+        cprofile = getattr(args, 'cprofile', False) or os.environ.get(CPROFILE_ENV, '') not in ('', '0')
+        return cls(script, report, cprofile)
+
+    @classmethod
+    def from_env(cls, script: str) -> 'Profiler':
+        """A profiler set up from the environment only, for scripts called as functions."""
+        return cls.from_args(None, script)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Measure the enclosed block as one stage.
+
+        Yields the stage's dict; set stage['rows_out'] (and rows_in, if not
+        known up front) inside the block.
+        """
+        stage = {'name': name, 'rows_in': rows_in, 'rows_out': None}
+        if not self.enabled:
+            yield stage
+            return
+        scope = 'stage' if reset_peak_rss() else 'process'
+        profile = cProfile.Profile() if self.cprofile else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile:
+            profile.enable()
+        try:
+            yield stage
+        finally:
+            if profile:
+                profile.disable()
+            wall_s = time.perf_counter() - wall_start
+            rows = stage['rows_out'] if stage['rows_out'] is not None else stage['rows_in']
+            stage.update({
+                'wall_s': round(wall_s, 4),
+                'cpu_s': round(time.process_time() - cpu_start, 4),
+                'rows_per_s': round(rows / wall_s, 1) if rows and wall_s > 0 else None,
+                'peak_rss_mb': peak_rss_mb(),
+                'peak_rss_scope': scope,
+            })
+            if profile:
+                stage['top_functions'] = top_functions(profile)
+                stage['profile_file'] = f'{self.report}.{name}.prof'
+                os.makedirs(os.path.dirname(os.path.abspath(self.report)), exist_ok=True)
+                profile.dump_stats(stage['profile_file'])
+            self.stages.append(stage)
+
+    def write(self) -> Optional[str]:
+        """Write the JSON report (if enabled) and return its path."""
+        if not self.enabled:
+            return None
+        report = {
+            'script': self.script,
+            'argv': sys.argv[1:],
+            'started': self.started,
+            'python': sys.version.split()[0],
+            'total_wall_s': round(time.perf_counter() - self._start, 4),
+            'stages': self.stages,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.report)), exist_ok=True)
+        with open(self.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"Profile written to {self.report}", file=sys.stderr)
+        return self.report
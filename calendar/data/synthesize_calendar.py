@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Calendar Synthesis
+Builds the calendar TSV (date, feast_name, description, fast_type,
+moon_phase) for any range of years from a feast template, without a yearly
+text file for each of them.
+
+The template is made from the parsed raw/YYYY.txt files and has two parts:
+
+    fixed     keyed by month-day: the saints and feasts of the day with the
+              notes that belong to them
+    moveable  keyed by days from Pascha, for PASCHA_WINDOW (the Triodion and
+              Pentecostarion): Sunday and Holy Week titles, service notes
+              and Sunday readings
+
+A synthesized day is its fixed entry plus, inside the window, the moveable
+entry of its Pascha offset. Sundays outside the window get a plain "Неделя"
+title with the computed tone and eothinon (the numbered Sunday titles and
+their readings are not synthesized). Notes that depend on the weekday of a
+fixed date come from WEEKDAY_NOTES, not from the template year. Fast flags
+are computed like the parser does and then go through
+update_fasts.apply_fast_rules; moon markers come from
+moon_phases.calendar_markers, like in pipeline.py. With several raw files,
+later years override earlier ones.
+
+For a template year, fast_type and moon_phase match the served calendar
+(apart from Good Friday, see the parser's STRICT_FAST_PASCHA_OFFSETS); feast
+names differ only in the Sundays outside the window and in the order of the
+moveable and weekday notes.
+
+Years are split into contiguous chunks across worker processes.
+
+Usage: python synthesize_calendar.py 1900 2100 [-o build/orthodox_feasts_1900-2100.csv]
+                                     [--workers N] [--moon-backend astropy|fast|ephem] [--offline]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DATA_DIR, 'raw'))
+sys.path.insert(0, os.path.join(DATA_DIR, 'processed'))
+sys.path.insert(0, DATA_DIR)
+
+import moon_phases  # noqa: E402
+import update_fasts  # noqa: E402
+from bulgarian_calendar_parser import (  # noqa: E402
+    STRICT_FAST_DATES, STRICT_FAST_PASCHA_OFFSETS, BulgarianCalendarParser)
+from calendar_tsv import format_calendar_tsv  # noqa: E402
+from feast_record import FISH, OIL, STRICT, Feast  # noqa: E402
+from paschalion import orthodox_easter  # noqa: E402
+
+DEFAULT_RAW_DIR = os.path.join(DATA_DIR, 'raw')
+DEFAULT_BUILD_DIR = os.path.join(DATA_DIR, 'build')
+CALENDAR_FIELDNAMES = ['date', 'feast_name', 'description', 'fast_type', 'moon_phase']
+
+# Days from Pascha whose text depends on Pascha: Sunday of the Publican and
+# the Pharisee through the first day of the Apostles' fast, inclusive
+PASCHA_WINDOW = (-70, 57)
+THOMAS_SUNDAY = 7      # The tones (Гл.) start again from 1
+ALL_SAINTS_SUNDAY = 56  # The eleven eothina (утр. ев.) start again from 1
+SUNDAY_TITLE = 'Неделя'
+
+# Leading sentences of a day in the window that name the moveable commemoration
+MOVEABLE_TITLES = [
+    r'\d*\s*Неделя\b',
+    r'Възкресение Христово',
+    r'Светл[аио]\w* (?:понеделник|вторник|сряда|четвъртък|петък|събота)',
+    r'Велик[аи] (?:понеделник|вторник|сряда|четвъртък|петък|събота)',
+    r'(?:Тодорова|Лазарова|Акатистна) събота',
+    r'Преполовение', r'Отдание на Пасха', r'Възнесение Господне', r'Свети Дух',
+    # Holy Week and Bright Friday commemorations that follow the day's title
+    r'Йосиф Прекрасни', r'Десетте Девици', r'Помазването на Господа', r'Тайната вечеря',
+    r'Св\. страдания Господни', r'Слизането на Господа', r'Живоприемни източник',
+]
+# Notes (in parentheses or brackets) of a day in the window that belong to the
+# moveable cycle rather than to the saints of the date
+MOVEABLE_NOTES = [
+    r'лит\.', r'Тип\.', r'повечерие', r'Задушница', r'великопостна', r'Блажи се',
+    r'Отдание на (?!празника)', r'Отд\. на', r'Начало на', r'Всичко на празника',
+    r'вечерта', r'сутринта', r'Утреня', r'Събота от',
+]
+# Notes of fixed dates that fall on certain weekdays, added by date instead of
+# being copied from the template year. Same 'start'/'end'/'weekdays' fields as
+# update_fasts.FAST_RULES
+WEEKDAY_NOTES = [
+    # Wednesdays and Fridays of the Twelve Days of Christmas (after the great feasts) are fast-free
+    {'start': (12, 26), 'end': (12, 31), 'weekdays': update_fasts.WEDNESDAY_FRIDAY, 'note': '(Блажи се)'},
+    {'start': (1, 2), 'end': (1, 4), 'weekdays': update_fasts.WEDNESDAY_FRIDAY, 'note': '(Блажи се)'},
+    # Archangel's Saturday of the Dead: the Saturday before November 8
+    {'start': (11, 1), 'end': (11, 7), 'weekdays': (5,), 'note': '(Задушница)'},
+]
+# Fixed feasts of dates a template year does not have
+FIXED_FALLBACK = {'02-29': 'Преп. Йоан Касиан Римлянин'}
+# Great feasts whose † a template year shows only on the Sunday title they share a day with
+FIXED_MARKERS = {'02-02': '†', '06-29': '†'}
+
+# Abbreviations whose dot does not end a sentence ("Св. мчк ...", "ап. Евр. 2:11")
+ABBREVIATIONS = {
+    'Св', 'св', 'Преп', 'преп', 'Пресв', 'Блаж', 'Прав', 'прав', 'прор', 'еп', 'архиеп', 'митр',
+    'патр', 'презв', 'равноап', 'мон', 'ап', 'ев', 'утр', 'лит', 'Гл', 'др', 'Деян', 'Рим',
+    'Кор', '1Кор', '2Кор', 'Гал', 'Еф', 'Фил', 'Кол', 'Тим', '1Тим', 'Евр',
+}
+MARKERS = ('†', '*')  # Strongest first
+MARKER_RE = re.compile(r'^([†*])\s*')
+NOTE_RE = re.compile(r'\[[^\]]*\]|\([^)]*\)')
+MASK = '\x00'  # Neither whitespace nor a word character, so patterns never run into a masked note
+SENTENCE_END_RE = re.compile(r'(\w*)\.\s+')
+# Start of the readings: tone, eothinon, epistle or gospel reference
+LECTIONARY_RE = re.compile(r'[.,]?\s*(?:Гл\.\s*\d|утр\.\s*ев\.|лит\.\s*ев\.|ап\.\s*\d?\s*[А-Я][а-я]*\.\s*\d)')
+TITLE_RES = [re.compile(pattern) for pattern in MOVEABLE_TITLES]
+MOVEABLE_NOTE_RE = re.compile('|'.join(MOVEABLE_NOTES))
+WEEKDAY_NOTE_TEXTS = {rule['note'] for rule in WEEKDAY_NOTES}
+
+
+class Part(NamedTuple):
+    """One half of a day's text: marker (†, * or ''), sentences, extra notes and readings."""
+    marker: str
+    text: str
+    notes: Tuple[str, ...]
+    readings: str
+
+
+EMPTY_PART = Part('', '', (), '')
+
+
+def _mask_notes(text: str) -> str:
+    """text with every note blanked out (not with spaces), so positions still line up."""
+    return NOTE_RE.sub(lambda match: MASK * len(match.group()), text)
+
+
+def _sentences(masked: str) -> List[Tuple[int, int]]:
+    """(start, end) of every sentence, split on dots outside notes that do not end an abbreviation."""
+    bounds = []
+    start = 0
+    for match in SENTENCE_END_RE.finditer(masked):
+        if match.group(1) not in ABBREVIATIONS:
+            bounds.append((start, match.start() + len(match.group(1))))
+            start = match.end()
+    bounds.append((start, len(masked)))
+    return bounds
+
+
+def split_day(line: str, in_window: bool, sunday: bool) -> Tuple[Part, Part]:
+    """
+    Split a day's text into its fixed and moveable parts.
+
+    Notes stay where they are in the fixed text unless they move to the
+    moveable part (in the window, and not on a great feast) or are
+    WEEKDAY_NOTES. Outside the window a Sunday's title and readings are
+    dropped, since those Sundays are synthesized from the tone cycle.
+    """
+    match = MARKER_RE.match(line)
+    marker = match.group(1) if match else ''
+    body = line[match.end():] if match else line
+    masked = _mask_notes(body)
+
+    # Title: leading sentences naming the moveable commemoration
+    title_end = rest_start = 0
+    if in_window or sunday:
+        for start, end in _sentences(masked):
+            if any(title_re.match(masked, start) for title_re in TITLE_RES):
+                title_end = rest_start = end
+            else:
+                rest_start = start if title_end else 0
+                break
+    title = body[:title_end].strip()
+    rest, masked_rest = body[rest_start:], masked[rest_start:]
+    fixed_marker = '' if title else marker
+
+    # Readings of a Sunday: from the first reference outside notes to the end
+    readings = ''
+    if sunday:
+        match = LECTIONARY_RE.search(masked_rest)
+        if match:
+            rest, readings = rest[:match.start()], rest[match.start():]
+
+    # Notes leave the fixed text if they are moveable or come from WEEKDAY_NOTES
+    text = []
+    moveable_notes = []
+    position = 0
+    for match in NOTE_RE.finditer(rest):
+        note = match.group()
+        moveable = in_window and fixed_marker != '†' and MOVEABLE_NOTE_RE.search(note)
+        if not moveable and note not in WEEKDAY_NOTE_TEXTS:
+            continue
+        if moveable:
+            moveable_notes.append(note)
+        text.append(rest[position:match.start()].rstrip())
+        position = match.end()
+    text.append(rest[position:])
+    fixed = Part(fixed_marker, ''.join(text).strip(), (), '')
+    if not in_window:
+        return fixed, EMPTY_PART
+    return fixed, Part(marker if title else '', title, tuple(moveable_notes), readings.strip())
+
+
+def strongest_marker(*markers: str) -> str:
+    for marker in MARKERS:
+        if marker in markers:
+            return marker
+    return ''
+
+
+def sunday_readings(day: date) -> str:
+    """'Гл. N, утр. ев. M' for a Sunday outside the window, counted from the last Pascha."""
+    pascha = orthodox_easter(day.year)
+    if day < pascha:
+        pascha = orthodox_easter(day.year - 1)
+    tone = (day - pascha).days // 7 - THOMAS_SUNDAY // 7
+    eothinon = (day - pascha).days // 7 - ALL_SAINTS_SUNDAY // 7
+    return f'Гл. {tone % 8 + 1}, утр. ев. {eothinon % 11 + 1}'
+
+
+def weekday_notes(day: date) -> List[str]:
+    notes = []
+    for rule in WEEKDAY_NOTES:
+        if (date(day.year, *rule['start']) <= day <= date(day.year, *rule['end'])
+                and day.weekday() in rule['weekdays']):
+            notes.append(rule['note'])
+    return notes
+
+
+class CalendarTemplate:
+    """Fixed parts by 'MM-DD' and moveable parts by days from Pascha."""
+
+    def __init__(self, fixed: Dict[str, Part], moveable: Dict[int, Part], years: List[int]):
+        self.fixed = fixed
+        self.moveable = moveable
+        self.years = years
+
+    @classmethod
+    def from_feasts(cls, feasts: Iterable[Feast]) -> 'CalendarTemplate':
+        """A template from parsed feast records (a day's lines are joined with a space)."""
+        days: Dict[str, List[str]] = {}
+        for feast in feasts:
+            days.setdefault(feast.date, []).append(feast.feast_name)
+        fixed, moveable, years = {}, {}, set()
+        for date_str in sorted(days):
+            day = date.fromisoformat(date_str)
+            offset = (day - orthodox_easter(day.year)).days
+            in_window = PASCHA_WINDOW[0] <= offset <= PASCHA_WINDOW[1]
+            fixed_part, moveable_part = split_day(' '.join(days[date_str]), in_window, day.weekday() == 6)
+            month_day = date_str[5:]
+            if not fixed_part.marker and month_day in FIXED_MARKERS:
+                fixed_part = fixed_part._replace(marker=FIXED_MARKERS[month_day])
+            fixed[month_day] = fixed_part
+            if in_window:
+                moveable[offset] = moveable_part
+            years.add(day.year)
+        return cls(fixed, moveable, sorted(years))
+
+    @classmethod
+    def from_raw(cls, paths: List[str]) -> 'CalendarTemplate':
+        """A template from calendar text files, later files overriding earlier ones."""
+        parser = BulgarianCalendarParser()
+        return cls.from_feasts(feast for path in paths for feast in parser.iter_feasts(path))
+
+    def day_text(self, day: date, pascha: date) -> str:
+        """The synthesized feast_name of one day."""
+        month_day = day.isoformat()[5:]
+        offset = (day - pascha).days
+        sunday = day.weekday() == 6
+        fixed = self.fixed.get(month_day) or Part('', FIXED_FALLBACK.get(month_day, ''), (), '')
+        in_window = PASCHA_WINDOW[0] <= offset <= PASCHA_WINDOW[1]
+        moveable = self.moveable.get(offset, EMPTY_PART) if in_window else EMPTY_PART
+
+        title = moveable.text
+        readings = moveable.readings
+        # A great feast on a Sunday outside the window keeps its own title and readings
+        if sunday and not title and fixed.marker != '†':
+            title = SUNDAY_TITLE
+            readings = readings or sunday_readings(day)
+
+        marker = strongest_marker(fixed.marker, moveable.marker, '†' if sunday else '')
+        text = '. '.join(part for part in (title, fixed.text) if part)
+        notes = list(moveable.notes) + weekday_notes(day)
+        line = ' '.join(part for part in [marker, text] + notes if part)
+        if readings:
+            line += readings if readings[0] in '.,' else '. ' + readings
+        return line
+
+    def feasts(self, first_year: int, last_year: int) -> List[Feast]:
+        """Feast records for every day of first_year through last_year, with the parser's flags."""
+        feasts = []
+        for year in range(first_year, last_year + 1):
+            pascha = orthodox_easter(year)
+            strict_days = {pascha + timedelta(days=offset) for offset in STRICT_FAST_PASCHA_OFFSETS}
+            day = date(year, 1, 1)
+            while day.year == year:
+                flags = 0
+                if day.weekday() in update_fasts.WEDNESDAY_FRIDAY:
+                    flags |= FISH | OIL
+                if (day.month, day.day) in STRICT_FAST_DATES or day in strict_days:
+                    flags |= STRICT
+                feasts.append(Feast(day.isoformat(), self.day_text(day, pascha), '', flags))
+                day += timedelta(days=1)
+        return feasts
+
+
+def synthesize_rows(template: CalendarTemplate, first_year: int, last_year: int,
+                    moon_backend: str = 'astropy') -> List[Dict]:
+    """Calendar rows for first_year through last_year (fast rules and moon markers applied)."""
+    feasts = update_fasts.apply_fast_rules(template.feasts(first_year, last_year))
+    cache_dir = None if moon_backend == 'fast' else moon_phases.PHASE_CACHE_DIR
+    markers = moon_phases.calendar_markers([feast.date for feast in feasts], moon_backend, cache_dir)
+    return [{
+        'date': feast.date,
+        'feast_name': feast.feast_name,
+        'description': feast.description,
+        'fast_type': update_fasts.fast_type(feast.flags),
+        'moon_phase': int(marker),
+    } for feast, marker in zip(feasts, markers.tolist())]
+
+
+def _synthesize_chunk(args: Tuple[CalendarTemplate, int, int, str, Dict]) -> str:
+    """Worker: calendar TSV lines (no header) for a chunk of years."""
+    template, first_year, last_year, moon_backend, astropy_settings = args
+    # A spawned worker does not inherit the parent's configure_astropy() call
+    moon_phases.configure_astropy(**astropy_settings)
+    text = format_calendar_tsv(synthesize_rows(template, first_year, last_year, moon_backend), CALENDAR_FIELDNAMES)
+    return text.split('\n', 1)[1]
+
+
+def year_chunks(first_year: int, last_year: int, chunks: int) -> List[Tuple[int, int]]:
+    """first_year..last_year split into at most chunks contiguous, nearly equal ranges."""
+    years = last_year - first_year + 1
+    chunks = max(1, min(chunks, years))
+    bounds = [first_year + years * i // chunks for i in range(chunks + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(chunks)]
+
+
+def synthesize(template: CalendarTemplate, first_year: int, last_year: int, output_file: str,
+               workers: Optional[int] = None, moon_backend: str = 'astropy') -> int:
+    """Write the calendar TSV for first_year through last_year; returns the number of rows."""
+    workers = workers or os.cpu_count() or 1
+    settings = dict(moon_phases.ASTROPY_SETTINGS)
+    jobs = [(template, first, last, moon_backend, settings)
+            for first, last in year_chunks(first_year, last_year, workers)]
+    if len(jobs) == 1:
+        bodies = [_synthesize_chunk(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            bodies = list(pool.map(_synthesize_chunk, jobs))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    tmp_path = output_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\t'.join(CALENDAR_FIELDNAMES) + '\n')
+        for body in bodies:
+            f.write(body)
+    os.replace(tmp_path, output_file)
+    return sum(body.count('\n') for body in bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthesize the calendar for any range of years from a feast template.')
+    parser.add_argument('first_year', type=int)
+    parser.add_argument('last_year', type=int, nargs='?', help='default: first_year')
+    parser.add_argument('-o', '--output', help='default: build/orthodox_feasts_FIRST-LAST.csv')
+    parser.add_argument('--raw-dir', default=DEFAULT_RAW_DIR, help='directory with the YYYY.txt template years')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--moon-backend', default='astropy', choices=list(moon_phases.BACKENDS),
+                        help='astropy reproduces the served calendar; fast and ephem are approximations')
+    parser.add_argument('--offline', action='store_true', help='never let astropy download IERS data')
+    args = parser.parse_args()
+    if args.offline:
+        moon_phases.configure_astropy(offline=True)
+    last_year = args.last_year if args.last_year is not None else args.first_year
+    if last_year < args.first_year:
+        parser.error('last_year is before first_year')
+    output = args.output or os.path.join(DEFAULT_BUILD_DIR, f'orthodox_feasts_{args.first_year}-{last_year}.csv')
+
+    raw_files = sorted(glob.glob(os.path.join(args.raw_dir, '[0-9][0-9][0-9][0-9].txt')))
+    if not raw_files:
+        print(f"No YYYY.txt files in {args.raw_dir}")
+        sys.exit(1)
+    start = time.perf_counter()
+    template = CalendarTemplate.from_raw(raw_files)
+    rows = synthesize(template, args.first_year, last_year, output, args.workers, args.moon_backend)
+    years = ', '.join(str(year) for year in template.years)
+    print(f"Wrote {rows} rows ({args.first_year}-{last_year}) to {output} from template year(s) {years}"
+          f" in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
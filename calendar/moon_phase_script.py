@@ -1,6 +1,12 @@
+import argparse
+import os
+import sys
+
 import pandas as pd
-from astropy.coordinates import get_moon_phase
-from astropy.time import Time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+import moon_phases  # noqa: E402
+from stage_metrics import Profiler, add_profile_arguments  # noqa: E402
 
 # Function to determine the moon phase number
 def get_phase_number(phase):
@@ -17,14 +23,35 @@ def get_phase_number(phase):
     else:
         return 0  # No major phase change
 
-# Read the CSV file (tab-separated)
-df = pd.read_csv('orthodox_feasts.csv', sep='\t')
+def main():
+    parser = argparse.ArgumentParser(description='Set the moon_phase column of orthodox_feasts.csv from astropy.')
+    parser.add_argument('--offline', action='store_true', help='never let astropy download IERS data')
+    parser.add_argument('--no-cache', action='store_true', help='recompute every date')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = Profiler.from_args(args, 'moon_phase_script')
+    moon_phases.configure_astropy(offline=args.offline or None)
+
+    # Read the CSV file (tab-separated)
+    with profiler.stage('read') as stage:
+        df = pd.read_csv('orthodox_feasts.csv', sep='\t')
+        stage['rows_out'] = len(df)
+
+    # Calculate moon phase for each date and assign the number
+    # (Sun-Moon elongation from astropy, astropy imported only if some date is not cached yet)
+    with profiler.stage('phases', rows_in=len(df)) as stage:
+        cache_dir = None if args.no_cache else moon_phases.PHASE_CACHE_DIR
+        phases = moon_phases.lunation(df['date'].tolist(), 'astropy', cache_dir)
+        df['moon_phase'] = [get_phase_number(phase) for phase in phases]
+        stage['rows_out'] = len(df)
 
-# Calculate moon phase for each date and assign the number
-df['moon_phase'] = df['date'].apply(lambda d: get_phase_number(get_moon_phase(Time(d))))
+    # Write back to the CSV file
+    with profiler.stage('write', rows_in=len(df)) as stage:
+        df.to_csv('orthodox_feasts.csv', sep='\t', index=False)
+        stage['rows_out'] = len(df)
 
-# Write back to the CSV file
-df.to_csv('orthodox_feasts.csv', sep='\t', index=False)
+    print("Moon phases updated in orthodox_feasts.csv")
+    profiler.write()
 
-print("Moon phases updated in orthodox_feasts.csv")
-8
\ No newline at end of file
+if __name__ == "__main__":
+    main()
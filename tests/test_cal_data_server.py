@@ -0,0 +1,39 @@
+import json
+import os
+
+from cal_data_server import FeastIndex
+
+HEADER = 'date\tfeast_name\tdescription\tfast_type\tmoon_phase\n'
+
+
+def write_calendar(path, name, mtime):
+    path.write_text(HEADER + f'2025-01-01\t"{name}"\t""\t"0"\t"0"\n', encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_response_cached_on_its_own_snapshot(tmp_path):
+    path = tmp_path / 'calendar.csv'
+    write_calendar(path, 'old', 1000)
+    index = FeastIndex(str(path))
+    old = index.refresh()
+
+    write_calendar(path, 'new', 2000)
+    new = index.refresh()
+    # A request that started before the reload finishes against the old snapshot
+    old_body, _ = old.month('01', '2025')
+
+    body, _ = index.month('01', '2025')
+    assert json.loads(body)[0]['feast_name'] == 'new'
+    assert json.loads(old_body)[0]['feast_name'] == 'old'
+    assert index.snapshot is new and index.mtime == 2000
+
+
+def test_missing_csv_serves_empty_months_until_it_appears(tmp_path):
+    path = tmp_path / 'calendar.csv'
+    index = FeastIndex(str(path))
+    body, _ = index.refresh().month('01', '2025')
+    assert json.loads(body) == []
+
+    write_calendar(path, 'new', 2000)
+    body, _ = index.refresh().month('01', '2025')
+    assert json.loads(body)[0]['feast_name'] == 'new'
@@ -0,0 +1,31 @@
+import calendar_check
+from feast_schema import FAST_TYPE_OVERFLOW, MOON_OVERFLOW, FeastTable, parse_row
+
+HEADER = 'date\tfeast_name\tdescription\tfast_type\tmoon_phase\n'
+
+
+def test_parse_row_keeps_unknown_fast_type():
+    row = parse_row({'date': '2025-01-01', 'feast_name': 'x', 'description': '', 'fast_type': '7', 'moon_phase': '0'})
+    assert row == ('2025-01-01', 'x', '', 0, 7, 0)
+
+
+def test_parse_row_maps_overflowing_values_to_sentinels():
+    rows = [{'date': '2025-01-01', 'feast_name': 'x', 'description': '', 'fast_type': '300', 'moon_phase': '200'},
+            {'date': '2025-01-02', 'feast_name': 'y', 'description': '', 'fast_type': '1', 'moon_phase': '-300'}]
+    assert parse_row(rows[0])[4:] == (FAST_TYPE_OVERFLOW, MOON_OVERFLOW)
+    table = FeastTable.from_rows(rows)
+    assert list(table.fast_type) == [FAST_TYPE_OVERFLOW, 1]
+    assert list(table.moon_phase) == [MOON_OVERFLOW, MOON_OVERFLOW]
+
+
+def test_validate_reports_malformed_fast_type(tmp_path):
+    path = tmp_path / 'calendar.csv'
+    path.write_text(HEADER
+                    + '2025-01-01\t"a"\t""\t"0"\t"0"\n'
+                    + '2025-01-02\t"b"\t""\t"7"\t"0"\n'
+                    + '2025-01-03\t"c"\t""\t"1"\t"0"\n', encoding='utf-8')
+    with calendar_check.FeastFile(str(path)) as rows:
+        result = calendar_check.validate(rows)
+    assert result['rows'] == 3
+    assert result['issues'].counts == {'fast_type': 1}
+    assert result['issues'].examples == [('fast_type', '2025-01-02', 'fast_type 7 outside 0-4')]
@@ -0,0 +1,18 @@
+import numpy as np
+
+from calendar_store import CalendarStore, to_ordinal
+from conftest import SERVED_CALENDAR
+
+
+def test_fast_days_match_a_scan():
+    store = CalendarStore.load(SERVED_CALENDAR)
+    fast_types = store.columns['fast_type']
+    for fast_type in range(6):
+        for start, end in ((None, None), ('2025-03-01', '2025-04-30'), ('2025-12-31', None)):
+            expected = (fast_types == fast_type)
+            if start is not None:
+                expected &= store.date >= to_ordinal(start)
+            if end is not None:
+                expected &= store.date <= to_ordinal(end)
+            assert np.array_equal(store.fast_days(fast_type, start, end).date, store.date[expected])
+    assert len(store.fast_days(300)) == 0
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from conftest import DATA_DIR, FAST_TYPE_DIFFERENCES, read_calendar
+
+
+@pytest.fixture(scope='module')
+def pipeline_2025(tmp_path_factory, offline_astropy):
+    import pipeline
+
+    build_dir = tmp_path_factory.mktemp('build')
+    output = os.path.join(build_dir, 'orthodox_feasts.csv')
+    p = pipeline.Pipeline(os.path.join(DATA_DIR, 'raw'), str(build_dir))
+    p.run(force=True)
+    p.merge(output)
+    return read_calendar(output)
+
+
+def test_moon_phase_matches_served_calendar(pipeline_2025, served_calendar):
+    assert [row['date'] for row in pipeline_2025] == [row['date'] for row in served_calendar]
+    assert [row['moon_phase'] for row in pipeline_2025] == [row['moon_phase'] for row in served_calendar]
+
+
+def test_phase_marked_on_last_day_of_run():
+    import moon_phases
+
+    # Lunation fractions: a full-moon run ending on the third day, then a run still going
+    numbers = moon_phases.get_phase_numbers([0.45, 0.5, 0.55, 0.62, 0.7, 0.72])
+    assert list(numbers) == [3, 3, 3, 0, 4, 4]
+    assert list(moon_phases.mark_last_phase_days(numbers)) == [0, 0, 3, 0, 0, 4]
+
+
+def test_fast_type_matches_served_calendar(pipeline_2025, served_calendar):
+    differences = {built['date']: (built['fast_type'], served['fast_type'])
+                   for built, served in zip(pipeline_2025, served_calendar)
+                   if built['fast_type'] != served['fast_type']}
+    assert differences == FAST_TYPE_DIFFERENCES
+
+
+def test_cheese_week_is_dairy(pipeline_2025):
+    cheese_week = [row['fast_type'] for row in pipeline_2025 if '2025-02-24' <= row['date'] <= '2025-03-02']
+    assert cheese_week == ['2'] * 7
+
+
+def test_paschalion_change_rebuilds_parse_and_fasts(tmp_path, monkeypatch):
+    import paschalion
+    import pipeline
+
+    p = pipeline.Pipeline(os.path.join(DATA_DIR, 'raw'), str(tmp_path), moon_backend='fast')
+    p.run()
+    assert p.run() == {'parse': [], 'fasts': [], 'moon': []}
+
+    edited = tmp_path / 'paschalion.py'
+    edited.write_text(open(paschalion.__file__, encoding='utf-8').read() + '\n# edited\n', encoding='utf-8')
+    monkeypatch.setattr(paschalion, '__file__', str(edited))
+    rebuilt = p.run()
+    assert rebuilt['parse'] == list(p.raw_files)
+    assert rebuilt['fasts'] == list(p.raw_files)
+    # The outputs did not change, so the moon stage is still up to date
+    assert rebuilt['moon'] == []
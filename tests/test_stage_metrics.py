@@ -0,0 +1,14 @@
+import json
+import os
+
+import update_fasts
+from conftest import DATA_DIR
+
+
+def test_update_orthodox_feasts_profiles_from_environment(tmp_path, monkeypatch):
+    report = tmp_path / 'profile.json'
+    monkeypatch.setenv('CALENDAR_PROFILE', str(report))
+    update_fasts.update_orthodox_feasts(os.path.join(DATA_DIR, 'raw', 'orthodox_feasts.csv'),
+                                        str(tmp_path / 'orthodox_feasts.csv'))
+    stages = json.loads(report.read_text(encoding='utf-8'))['stages']
+    assert [stage['name'] for stage in stages] == ['read', 'rules', 'write']
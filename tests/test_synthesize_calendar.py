@@ -0,0 +1,66 @@
+import glob
+import os
+import re
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from conftest import DATA_DIR, FAST_TYPE_DIFFERENCES
+
+# raw/2025.txt lacks a saint the served file lists on this day
+RAW_TEXT_DIFFERENCES = {'2025-11-01'}
+
+
+@pytest.fixture(scope='module')
+def synthesized_2025(offline_astropy):
+    import synthesize_calendar
+
+    template = synthesize_calendar.CalendarTemplate.from_raw(
+        sorted(glob.glob(os.path.join(DATA_DIR, 'raw', '[0-9][0-9][0-9][0-9].txt'))))
+    return [{key: str(value) for key, value in row.items()}
+            for row in synthesize_calendar.synthesize_rows(template, 2025, 2025, 'astropy')]
+
+
+def words(text):
+    """Word counts, so spacing, punctuation and the order of notes do not matter."""
+    return Counter(re.findall(r'\w+', text))
+
+
+def test_columns_match_served_calendar(synthesized_2025, served_calendar):
+    assert [row['date'] for row in synthesized_2025] == [row['date'] for row in served_calendar]
+    assert [row['moon_phase'] for row in synthesized_2025] == [row['moon_phase'] for row in served_calendar]
+    assert [row['description'] for row in synthesized_2025] == [row['description'] for row in served_calendar]
+    differences = {built['date']: (built['fast_type'], served['fast_type'])
+                   for built, served in zip(synthesized_2025, served_calendar)
+                   if built['fast_type'] != served['fast_type']}
+    assert differences == FAST_TYPE_DIFFERENCES
+
+
+def test_names_match_served_calendar(synthesized_2025, served_calendar):
+    from paschalion import orthodox_easter
+    from synthesize_calendar import PASCHA_WINDOW
+
+    pascha = orthodox_easter(2025)
+    for built, served in zip(synthesized_2025, served_calendar):
+        day = date.fromisoformat(built['date'])
+        offset = (day - pascha).days
+        outside_window = day.weekday() == 6 and not PASCHA_WINDOW[0] <= offset <= PASCHA_WINDOW[1]
+        if outside_window or built['date'] in RAW_TEXT_DIFFERENCES:
+            # Numbered Sunday titles and their readings are not synthesized
+            assert not words(built['feast_name']) - words(served['feast_name']), built['date']
+        else:
+            assert words(built['feast_name']) == words(served['feast_name']), built['date']
+
+
+def test_chunk_applies_the_parent_astropy_settings(monkeypatch):
+    import moon_phases
+    import synthesize_calendar
+
+    template = synthesize_calendar.CalendarTemplate.from_raw(
+        sorted(glob.glob(os.path.join(DATA_DIR, 'raw', '[0-9][0-9][0-9][0-9].txt'))))
+    monkeypatch.setattr(moon_phases, 'ASTROPY_SETTINGS', dict(moon_phases.ASTROPY_SETTINGS, offline=False))
+    settings = dict(moon_phases.ASTROPY_SETTINGS, offline=True)
+    body = synthesize_calendar._synthesize_chunk((template, 2025, 2025, 'fast', settings))
+    assert body.startswith('2025-01-01\t')
+    assert moon_phases.ASTROPY_SETTINGS['offline'] is True
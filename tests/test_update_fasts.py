@@ -0,0 +1,18 @@
+import update_fasts
+from feast_record import FISH, Feast
+from feast_search import FeastSearchIndex
+
+# Text after the trailing liturgical references, outside any parentheses
+TRAILING_KEYWORD = 'Св. Х. Гл. 5, утр. ев. 3. Разрешава се риба'
+
+
+def test_keyword_after_trailing_references_is_found():
+    index = FeastSearchIndex.from_names([TRAILING_KEYWORD, 'Св. Х'])
+    assert index.matching_names('Разрешава се риба', 'text') == {TRAILING_KEYWORD}
+
+
+def test_keyword_rule_applies_after_trailing_references():
+    # 2025-03-05 is a Wednesday in the strict first week of Great Lent
+    feast, = update_fasts.apply_fast_rules([Feast('2025-03-05', TRAILING_KEYWORD)])
+    assert feast.flags == FISH
+    assert update_fasts.fast_type(feast.flags) == 1
@@ -0,0 +1,161 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+
+ytdlp_titles = pytest.importorskip('youtube_playlist_titles_ytdlp')
+
+
+def playlist_info(url, count=3, delay=0.0):
+    """Flat extraction result with lazily produced entries, like a lazy make_extractor()."""
+    def entries():
+        for i in range(count):
+            time.sleep(delay)
+            yield {'id': f'{url}-{i}', 'title': f'Video {i}'}
+    return {'id': url, 'title': f'Playlist {url}', 'entries': entries()}
+
+
+def extract_all(urls, extract, **kwargs):
+    kwargs.setdefault('workers', 2)
+    results = ytdlp_titles.extract_playlists(urls, extract=extract, **kwargs)
+    return {result['url']: result for result in results}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ytdlp_titles, 'RETRY_BACKOFF', 0.0)
+
+
+def test_extracts_every_playlist():
+    results = extract_all(['a', 'b', 'c'], playlist_info)
+    assert sorted(results) == ['a', 'b', 'c']
+    assert results['b']['count'] == 3
+    assert results['b']['entries'][0] == {'id': 'b-0', 'title': 'Video 0'}
+    assert results['b']['attempts'] == 1
+
+
+def test_retries_after_a_failure():
+    calls = []
+
+    def flaky(url):
+        calls.append(url)
+        if len(calls) == 1:
+            raise OSError('connection reset')
+        return playlist_info(url)
+
+    result = extract_all(['a'], flaky, retries=2)['a']
+    assert 'error' not in result
+    assert result['attempts'] == 2
+
+
+def test_error_record_after_the_last_retry():
+    def broken(url):
+        raise OSError('unavailable')
+
+    result = extract_all(['a'], broken, retries=1)['a']
+    assert result['error'] == 'OSError: unavailable'
+    assert result['attempts'] == 2
+    assert 'entries' not in result
+
+
+def test_stream_prints_each_title_as_it_arrives():
+    out = io.StringIO()
+    seen = []  # Output so far each time the extractor produces the next entry
+
+    def extract(url):
+        def entries():
+            for i in range(3):
+                seen.append(out.getvalue())
+                yield {'id': f'{url}-{i}', 'title': f'Video {i}'}
+        return {'id': url, 'title': 'Playlist', 'entries': entries()}
+
+    assert ytdlp_titles.stream_playlist_titles('a', extract, out) == 3
+    assert [text.count('. Video ') for text in seen] == [0, 1, 2]
+    assert not any('Total videos' in text for text in seen)
+    lines = out.getvalue().rstrip('\n').split('\n')
+    assert lines[-1] == 'Total videos: 3'
+    assert lines.index('1. Video 0') < lines.index('3. Video 2') < len(lines) - 1
+
+
+def test_negative_retries_still_make_one_attempt():
+    def broken(url):
+        raise OSError('unavailable')
+
+    assert extract_all(['a'], playlist_info, retries=-1)['a']['attempts'] == 1
+    assert extract_all(['a'], broken, retries=-1)['a']['error'] == 'OSError: unavailable'
+
+
+def test_timeout_between_entries():
+    result = extract_all(['slow'], lambda url: playlist_info(url, count=50, delay=0.01), timeout=0.05, retries=0)['slow']
+    assert result['error'].startswith('TimeoutError')
+
+
+def test_extractor_runs_on_the_pool_threads():
+    threads = set()
+
+    def record_thread(url):
+        threads.add(threading.current_thread())
+        return playlist_info(url)
+
+    extract_all([str(i) for i in range(8)], record_thread, workers=2)
+    assert len(threads) <= 2
+    assert threading.main_thread() not in threads
+
+
+def test_youtubedl_reused_per_worker(monkeypatch):
+    instances = []
+
+    class StubYoutubeDL:
+        def __init__(self, opts):
+            self.opts = opts
+            instances.append(self)
+
+        def extract_info(self, url, download=False, process=True, ie_key=None):
+            return playlist_info(url)
+
+    monkeypatch.setattr(ytdlp_titles.yt_dlp, 'YoutubeDL', StubYoutubeDL)
+    results = extract_all([str(i) for i in range(8)], None, workers=2, timeout=5)
+    assert len(results) == 8
+    assert 1 <= len(instances) <= 2
+    assert instances[0].opts['socket_timeout'] == 5
+
+
+def test_jsonl_output():
+    def extract(url):
+        if url == 'bad':
+            raise OSError('unavailable')
+        return playlist_info(url)
+
+    out = io.StringIO()
+    results = ytdlp_titles.extract_playlists(['good', 'bad'], workers=2, retries=0, extract=extract)
+    assert ytdlp_titles.write_jsonl(results, out) == (1, 1)
+    lines = {record['url']: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert lines['good']['count'] == 3
+    assert lines['bad']['error'] == 'OSError: unavailable'
+
+
+def test_incremental_falls_back_to_a_full_fetch(tmp_path):
+    videos = [f'v{i}' for i in range(10)]
+
+    def extract(url):
+        return {'id': url, 'title': url, 'entries': ({'id': video, 'title': video} for video in videos)}
+
+    cache = ytdlp_titles.PlaylistCache(str(tmp_path / 'cache.sqlite'), ttl=0)
+    try:
+        fetch = ytdlp_titles.fetch_playlist
+        assert fetch('p', extract, cache=cache)['count'] == 10
+        del videos[-1]
+
+        # Stops at the known run at the top, so the removed video stays cached
+        result = fetch('p', extract, cache=cache, incremental=True)
+        assert result['fetched_entries'] < 10
+        assert result['changes']['removed'] == []
+        assert result['count'] == 10
+
+        result = fetch('p', extract, cache=cache, incremental=True, full_refresh=0)
+        assert result['changes']['removed'] == [{'id': 'v9', 'title': 'v9'}]
+        assert result['count'] == 9
+    finally:
+        cache.close()
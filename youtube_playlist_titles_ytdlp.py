@@ -2,31 +2,74 @@
 YouTube Playlist Video Titles Extractor (using yt-dlp)
 
 This script extracts and prints all video titles from a YouTube playlist.
+Given several playlist URLs (as arguments or in a file), it extracts them
+concurrently and writes one JSON line per playlist as each one finishes.
+
+With --cache, playlists are kept in a SQLite database keyed by playlist ID.
+Playlists fetched within --ttl seconds are answered from it, and every
+refetch reports added, removed and renamed videos. --incremental reads
+entries lazily and stops once it reaches a run of already known videos, so
+an unchanged playlist costs its first page only. Videos removed below that
+point stay cached until the next full fetch, which --incremental still does
+once the last one is older than --full-refresh seconds.
+
+--stream prints titles as yt-dlp pages through the playlist instead of
+after the whole playlist is loaded; memory use does not grow with its size.
 Requires: yt-dlp library (pip install yt-dlp)
 
-Usage: python youtube_playlist_titles_ytdlp.py
+Usage: python youtube_playlist_titles_ytdlp.py [--stream]
+       python youtube_playlist_titles_ytdlp.py --stream URL [URL ...]
+       python youtube_playlist_titles_ytdlp.py URL [URL ...] [-f urls.txt] [--workers 4]
+                                               [--timeout 120] [--retries 2] [-o results.jsonl]
+                                               [--cache [DB]] [--ttl 21600] [--incremental] [--refresh]
+                                               [--full-refresh 604800]
 """
 
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import parse_qs, urlparse
+
 import yt_dlp
 
-def get_playlist_titles(playlist_url):
+# Shared by every YoutubeDL instance
+YDL_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': True,  # Don't download, just extract metadata
+    'force_generic_extractor': False,
+}
+
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 120  # seconds per attempt
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 2.0  # seconds, doubled after each failed attempt
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.playlist_cache.sqlite')
+DEFAULT_TTL = 6 * 3600  # seconds
+INCREMENTAL_OVERLAP = 3  # Known videos in a row, in cached order, that end an incremental fetch
+DEFAULT_FULL_REFRESH = 7 * 24 * 3600  # seconds; older full fetches make --incremental read everything
+
+
+def get_playlist_titles(playlist_url, stream=False):
     """
     Extract and print all video titles from a YouTube playlist using yt-dlp.
 
     Args:
         playlist_url (str): The URL of the YouTube playlist
+        stream (bool): Print each title as it arrives (see stream_playlist_titles)
     """
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': True,  # Don't download, just extract metadata
-        'force_generic_extractor': False,
-    }
-
+    if stream:
+        stream_playlist_titles(playlist_url)
+        return
     try:
         print(f"Loading playlist: {playlist_url}\n")
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
             # Extract playlist info
             playlist_info = ydl.extract_info(playlist_url, download=False)
 
@@ -50,14 +93,356 @@ def get_playlist_titles(playlist_url):
         print(f"Error: {e}")
         print("\nMake sure you have yt-dlp installed: pip install yt-dlp")
 
-if __name__ == "__main__":
-    # Get playlist URL from user
-    playlist_url = input("Enter YouTube playlist URL: ").strip()
 
-    if not playlist_url:
-        print("Error: No URL provided")
-        print("\nExample URL format:")
-        print("https://www.youtube.com/playlist?list=PLxxxxxxxxxxxxxx")
-    else:
-        get_playlist_titles(playlist_url)
+def open_playlist(playlist_url, extract=None):
+    """
+    (playlist title, generator of video titles) for a playlist.
+
+    Titles come from yt-dlp's lazy entries, so pages are requested only as
+    the generator is consumed and nothing before the current entry is kept.
+    """
+    if extract is None:
+        extract = make_extractor(lazy=True)
+    playlist_info = extract(playlist_url)
+    titles = (entry['title'] for entry in iter_entries(playlist_info))
+    return playlist_info.get('title', 'Unknown Playlist'), titles
+
+
+def stream_playlist_titles(playlist_url, extract=None, out=None):
+    """Print video titles as they arrive and the total at the end; returns the number of videos."""
+    out = out or sys.stdout
+    count = 0
+    try:
+        print(f"Loading playlist: {playlist_url}\n", file=out)
+        playlist_title, titles = open_playlist(playlist_url, extract)
+        print(f"Playlist: {playlist_title}\n", file=out)
+        print("=" * 80, file=out, flush=True)
+
+        for count, title in enumerate(titles, start=1):
+            print(f"{count}. {title}", file=out, flush=True)
+
+        print("=" * 80, file=out)
+        print(f"\nTotal videos: {count}", file=out, flush=True)
+
+    except Exception as e:
+        print(f"Error: {e}", file=out)
+        print("\nMake sure you have yt-dlp installed: pip install yt-dlp", file=out)
+    return count
+
+
+def make_extractor(ydl_opts=None, timeout=None, lazy=False):
+    """
+    Flat playlist extraction function for use from many threads.
+
+    Every thread gets its own YoutubeDL built from the same options;
+    timeout also becomes yt-dlp's socket timeout. With lazy=True the
+    playlist is not processed: 'entries' is the extractor's own generator
+    and pages are only requested as it is consumed.
+    """
+    opts = dict(YDL_OPTS if ydl_opts is None else ydl_opts)
+    if timeout is not None:
+        opts.setdefault('socket_timeout', timeout)
+    local = threading.local()
+
+    def extract(playlist_url):
+        ydl = getattr(local, 'ydl', None)
+        if ydl is None:
+            ydl = local.ydl = yt_dlp.YoutubeDL(opts)
+        if not lazy:
+            return ydl.extract_info(playlist_url, download=False)
+        info = ydl.extract_info(playlist_url, download=False, process=False)
+        # Unprocessed results can be redirects to the actual playlist extractor
+        while info.get('_type') in ('url', 'url_transparent'):
+            info = ydl.extract_info(info['url'], download=False, ie_key=info.get('ie_key'), process=False)
+        return info
+
+    return extract
+
+
+def playlist_key(playlist_url):
+    """Cache key for a playlist URL: its list= ID, or the URL itself."""
+    list_ids = parse_qs(urlparse(playlist_url).query).get('list')
+    return list_ids[0] if list_ids else playlist_url
+
+
+class PlaylistCache:
+    """Playlist entries (video ID and title, in order) in SQLite, keyed by playlist ID."""
+
+    def __init__(self, path=DEFAULT_CACHE, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('CREATE TABLE IF NOT EXISTS playlists ('
+                            'key TEXT PRIMARY KEY, id TEXT, url TEXT, title TEXT, fetched_at REAL)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS entries ('
+                            'key TEXT, position INTEGER, video_id TEXT, title TEXT, PRIMARY KEY (key, position))')
+            # Caches from before incremental fetches were limited in age
+            columns = [row[1] for row in self.db.execute('PRAGMA table_info(playlists)')]
+            if 'full_fetched_at' not in columns:
+                self.db.execute('ALTER TABLE playlists ADD COLUMN full_fetched_at REAL')
+
+    def get(self, key):
+        """Cached result for a playlist (with 'fetched_at' and 'full_fetched_at'), or None."""
+        with self.lock:
+            row = self.db.execute('SELECT id, url, title, fetched_at, full_fetched_at FROM playlists WHERE key = ?',
+                                  (key,)).fetchone()
+            if row is None:
+                return None
+            entries = self.db.execute('SELECT video_id, title FROM entries WHERE key = ? ORDER BY position',
+                                      (key,)).fetchall()
+        return {
+            'url': row[1], 'id': row[0], 'title': row[2],
+            'count': len(entries),
+            'entries': [{'id': video_id, 'title': title} for video_id, title in entries],
+            'fetched_at': row[3],
+            'full_fetched_at': row[4],
+        }
+
+    def is_fresh(self, cached):
+        return time.time() - cached['fetched_at'] < self.ttl
+
+    def store(self, key, result, full_fetched_at=None):
+        """Store a fetched playlist; full_fetched_at defaults to now (a full fetch)."""
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute('REPLACE INTO playlists (key, id, url, title, fetched_at, full_fetched_at) '
+                            'VALUES (?, ?, ?, ?, ?, ?)',
+                            (key, result.get('id'), result['url'], result.get('title'), now,
+                             now if full_fetched_at is None else full_fetched_at))
+            self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self.db.executemany('INSERT INTO entries VALUES (?, ?, ?, ?)',
+                                [(key, position, entry['id'], entry['title'])
+                                 for position, entry in enumerate(result['entries'])])
+
+    def close(self):
+        self.db.close()
+
+
+def iter_entries(playlist_info, deadline=None):
+    """
+    {'id', 'title'} for each video, consuming lazy entries as they are
+    produced; raises TimeoutError once time.monotonic() passes deadline.
+    """
+    for entry in playlist_info.get('entries') or []:
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("playlist not read within the timeout")
+        if entry:
+            yield {'id': entry.get('id'), 'title': entry.get('title', 'Unknown Title')}
+
 
+def playlist_result(playlist_url, playlist_info, entries=None):
+    """JSON-ready summary of a flat playlist extraction."""
+    if entries is None:
+        entries = list(iter_entries(playlist_info))
+    return {
+        'url': playlist_url,
+        'id': playlist_info.get('id'),
+        'title': playlist_info.get('title', 'Unknown Playlist'),
+        'count': len(entries),
+        'entries': entries,
+    }
+
+
+def diff_entries(old_entries, new_entries):
+    """Videos added, removed and renamed between two entry lists."""
+    old_titles = {entry['id']: entry['title'] for entry in old_entries}
+    new_ids = {entry['id'] for entry in new_entries}
+    return {
+        'added': [entry for entry in new_entries if entry['id'] not in old_titles],
+        'removed': [entry for entry in old_entries if entry['id'] not in new_ids],
+        'renamed': [{'id': entry['id'], 'old_title': old_titles[entry['id']], 'new_title': entry['title']}
+                    for entry in new_entries
+                    if entry['id'] in old_titles and old_titles[entry['id']] != entry['title']],
+    }
+
+
+def incremental_entries(playlist_info, cached_entries, overlap=INCREMENTAL_OVERLAP, deadline=None):
+    """
+    (entries, fetched) read from the top of the playlist until `overlap` known
+    videos follow each other as in the cached list; the rest is taken from
+    the cache. fetched counts the entries actually read.
+    """
+    positions = {entry['id']: i for i, entry in enumerate(cached_entries)}
+    fetched = []
+    run = 0
+    for entry in iter_entries(playlist_info, deadline):
+        fetched.append(entry)
+        position = positions.get(entry['id'])
+        if position is None:
+            run = 0
+            continue
+        previous = positions.get(fetched[-2]['id']) if len(fetched) > 1 else None
+        run = run + 1 if run and previous == position - 1 else 1
+        if run >= min(overlap, len(cached_entries)):
+            return fetched + cached_entries[position + 1:], len(fetched)
+    return fetched, len(fetched)
+
+
+def fetch_playlist(playlist_url, extract, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                   backoff=RETRY_BACKOFF, cache=None, incremental=False, refresh=False,
+                   full_refresh=DEFAULT_FULL_REFRESH):
+    """
+    Extract one playlist with a per-attempt timeout and retries; errors are returned, not raised.
+
+    Runs on the calling thread, so a per-thread extractor is reused across
+    attempts and playlists. The timeout is enforced by the extractor's socket
+    timeout for each request and checked between entries, which yt-dlp pages
+    in lazily.
+
+    With a cache, a fresh cached copy is returned without extracting, and a
+    refetch reports 'changes' against the cached copy. An incremental fetch
+    only notices removed videos above the known run it stops at, so it reads
+    the whole playlist once the last full fetch is full_refresh seconds old.
+    """
+    start = time.perf_counter()
+    key = playlist_key(playlist_url)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None and not refresh and cache.is_fresh(cached):
+        cached.update({'url': playlist_url, 'cached': True, 'attempts': 0,
+                       'seconds': round(time.perf_counter() - start, 3)})
+        return cached
+    if incremental and cached is not None:
+        incremental = time.time() - (cached['full_fetched_at'] or 0) < full_refresh
+
+    def attempt_fetch(url):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        info = extract(url)
+        if incremental and cached is not None:
+            entries, fetched = incremental_entries(info, cached['entries'], deadline=deadline)
+        else:
+            entries = list(iter_entries(info, deadline))
+            fetched = len(entries)
+        result = playlist_result(url, info, entries)
+        result['fetched_entries'] = fetched
+        return result
+
+    for attempt in range(1, max(retries, 0) + 2):
+        try:
+            result = attempt_fetch(playlist_url)
+            break
+        except Exception as e:
+            result = {'url': playlist_url, 'error': f"{type(e).__name__}: {e}"}
+            if attempt <= retries:
+                time.sleep(backoff * 2 ** (attempt - 1))
+
+    if cache is not None and 'error' not in result:
+        result['cached'] = False
+        if cached is not None:
+            result['changes'] = diff_entries(cached['entries'], result['entries'])
+        # An incremental fetch that took nothing from the cache read the whole playlist
+        full = not incremental or cached is None or result['fetched_entries'] == result['count']
+        cache.store(key, result, None if full else cached['full_fetched_at'])
+    result['attempts'] = attempt
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def extract_playlists(playlist_urls, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT,
+                      retries=DEFAULT_RETRIES, extract=None, cache=None, incremental=False, refresh=False,
+                      full_refresh=DEFAULT_FULL_REFRESH):
+    """
+    Extract many playlists on a bounded thread pool, yielding each result as it finishes.
+
+    extract(url) -> info dict defaults to a lazy make_extractor(), so the
+    timeout can be checked between pages; pass a stub to run without network.
+    """
+    if extract is None:
+        extract = make_extractor(timeout=timeout, lazy=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch_playlist, url, extract, timeout, retries, RETRY_BACKOFF,
+                               cache, incremental, refresh, full_refresh)
+                   for url in playlist_urls]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def read_urls(path):
+    """Playlist URLs from a file, one per line; blank lines and # comments are skipped."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def write_jsonl(results, out):
+    """Write each result as one JSON line as soon as it arrives; returns (succeeded, failed)."""
+    succeeded = failed = 0
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+        if 'error' in result:
+            failed += 1
+        else:
+            succeeded += 1
+    return succeeded, failed
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is negative")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract video titles from YouTube playlists.')
+    parser.add_argument('urls', nargs='*', help='playlist URLs (asked for interactively if none are given)')
+    parser.add_argument('-f', '--file', help='file with one playlist URL per line')
+    parser.add_argument('-o', '--output', help='JSON Lines output file (default: stdout)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='playlists extracted at once')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds per attempt')
+    parser.add_argument('--retries', type=non_negative_int, default=DEFAULT_RETRIES, help='extra attempts after a failure')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE, metavar='DB',
+                        help='SQLite playlist cache (default: .playlist_cache.sqlite next to this script)')
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL, help='seconds a cached playlist stays fresh')
+    parser.add_argument('--incremental', action='store_true',
+                        help='with --cache, read only until the already known videos start '
+                             '(videos removed further down are only noticed by a full fetch)')
+    parser.add_argument('--full-refresh', type=float, default=DEFAULT_FULL_REFRESH, metavar='SECONDS',
+                        help='with --incremental, read the whole playlist if the last full fetch is older')
+    parser.add_argument('--refresh', action='store_true', help='with --cache, refetch even fresh playlists')
+    parser.add_argument('--stream', action='store_true',
+                        help='print titles as they arrive, one playlist after another, instead of JSON Lines')
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        urls.extend(read_urls(args.file))
+
+    if not urls:
+        # Get playlist URL from user
+        playlist_url = input("Enter YouTube playlist URL: ").strip()
+
+        if not playlist_url:
+            print("Error: No URL provided")
+            print("\nExample URL format:")
+            print("https://www.youtube.com/playlist?list=PLxxxxxxxxxxxxxx")
+        else:
+            get_playlist_titles(playlist_url, stream=args.stream)
+        return
+
+    if args.stream:
+        for playlist_url in urls:
+            stream_playlist_titles(playlist_url)
+        return
+
+    cache = PlaylistCache(args.cache, args.ttl) if args.cache else None
+    try:
+        results = extract_playlists(urls, args.workers, args.timeout, args.retries,
+                                    cache=cache, incremental=args.incremental, refresh=args.refresh,
+                                    full_refresh=args.full_refresh)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as out:
+                succeeded, failed = write_jsonl(results, out)
+        else:
+            succeeded, failed = write_jsonl(results, sys.stdout)
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"{succeeded} playlists extracted, {failed} failed", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()